@@ -55,6 +55,30 @@ def tests(session):
         session.notify('clean-robots-cache')
 
 
+@nox.session(python=PYTHON_VERSIONS[-1], name='tests-parallel')
+def tests_parallel(session):
+    """
+    Runs the test suite on all CPU cores with pytest-xdist, without coverage. It is useful to get a quick feedback while
+    developing. Like the "tests" session, the parts to test can be given as extra arguments.
+    """
+    to_test = ['core', 'any_io', 'green']
+    for item in session.posargs:
+        if item not in to_test:
+            session.error(f'{item} is not part of {to_test}')
+    to_test = session.posargs if session.posargs else to_test
+
+    session.install('poetry>=1.0.0,<2.0.0')
+    session.run('poetry', 'install', '-E', 'full')
+    # xdist 2 requires pytest 6 while the project still uses pytest 5
+    session.install('pytest-xdist>=1.34,<2')
+    for part in to_test:
+        # tests of a same module stay on one worker, so module fixtures and the chrome driver are not set up many times
+        session.run('pytest', '-n', 'auto', '--dist=loadfile', f'tests/{part}')
+
+    if not CI_ENVIRONMENT:
+        session.notify('clean-robots-cache')
+
+
 @nox.session(python=PYTHON_VERSIONS[-1])
 def docs(session):
     """Builds the documentation."""
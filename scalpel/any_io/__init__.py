@@ -1,4 +1,4 @@
-from .files import read_mp, write_mp
+from .files import AsyncMsgpackWriter, read_mp, write_mp
 from .queue import Queue
 from .response import SeleniumResponse, StaticResponse
 from .selenium_spider import SeleniumSpider
@@ -8,6 +8,7 @@ __all__ = [
     # files
     'read_mp',
     'write_mp',
+    'AsyncMsgpackWriter',
     # spider
     'StaticSpider',
     'SeleniumSpider',
@@ -1,13 +1,16 @@
 """Utility async functions to read and write mp files."""
 import logging
 from pathlib import Path
-from typing import Any, AsyncIterator, Callable, Union
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Union
 
 import anyio
+import attr
 import msgpack
 
 logger = logging.getLogger('scalpel')
 
+READ_CHUNK_SIZE = 64 * 1024
+
 
 async def read_mp(filename: Union[str, Path], decoder: Callable = None) -> AsyncIterator[Any]:
     """
@@ -33,13 +36,108 @@ async def read_mp(filename: Union[str, Path], decoder: Callable = None) -> Async
         logger.exception(message)
         raise TypeError(message)
 
+    unpacker = msgpack.Unpacker(object_hook=decoder)
     async with await anyio.open_file(filename, 'rb') as f:
-        content = await f.read()
-        unpacker = msgpack.Unpacker(None, max_buffer_size=len(content), object_hook=decoder)
-        unpacker.feed(content)
         logger.debug('reading data from file %s', filename)
-        for data in unpacker:
-            yield data
+        # the file is read by chunks so that items are yielded as soon as they are unpacked
+        while True:
+            chunk = await f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            unpacker.feed(chunk)
+            for data in unpacker:
+                yield data
+
+
+def _check_mode(_, _attribute: attr.Attribute, mode: str) -> None:
+    if mode not in ['a', 'w']:
+        message = f'The only modes expected are "a" and "w" but you provided {mode}'
+        logger.exception(message)
+        raise TypeError(message)
+
+
+def _check_encoder(_, _attribute: attr.Attribute, encoder: Optional[Callable]) -> None:
+    if encoder is not None and not callable(encoder):
+        message = f'{encoder} is not callable'
+        logger.exception(message)
+        raise TypeError(message)
+
+
+@attr.s
+class AsyncMsgpackWriter:
+    """
+    An async context manager keeping a `msgpack` file open to write many items without reopening it each time.
+
+    **Parameters:**
+
+    * **filename:** The name of the file where data will be written. It can be a string or a `pathlib.Path`.
+    * **mode:** The mode in which the file is opened. Valid values are "a" (append) and "w" (write). Defaults to "a".
+    * **encoder:** An optional function used to encode data types not handled by default by `msgpack`.
+
+    Usage:
+
+    ```
+    from datetime import datetime
+    from scalpel import datetime_encoder
+    from scalpel.any_io import AsyncMsgpackWriter
+
+    async with AsyncMsgpackWriter('file.mp', 'w', datetime_encoder) as writer:
+        await writer.write({'fruit': 'apple', 'date': datetime.utcnow()})
+        await writer.writemany([{'fruit': 'orange'}, {'fruit': 'banana'}])
+    ```
+    """
+
+    _filename: Union[str, Path] = attr.ib()
+    _mode: str = attr.ib(default='a', validator=_check_mode)
+    _encoder: Optional[Callable] = attr.ib(default=None, validator=_check_encoder)
+    _file: Optional[anyio.AsyncFile] = attr.ib(default=None, init=False, repr=False)
+    _packer: msgpack.Packer = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        # the packer is created after validation since msgpack raises its own error for a non callable encoder
+        self._packer = msgpack.Packer(default=self._encoder)
+
+    async def open(self) -> None:
+        """Opens the underlying file. It is automatically called when using the writer as a context manager."""
+        if self._file is None:
+            logger.debug('opening file %s in mode %s', self._filename, self._mode)
+            self._file = await anyio.open_file(self._filename, f'{self._mode}b')
+
+    async def write(self, data: Any) -> int:
+        """
+        Serializes and writes one item.
+
+        **Returns:** The number of written bytes.
+        """
+        await self.open()
+        data_length = await self._file.write(self._packer.pack(data))
+        logger.debug('writing %s bytes in file %s', data_length, self._filename)
+        return data_length
+
+    async def writemany(self, items: Iterable[Any]) -> int:
+        """
+        Serializes many items and writes them in one call since `msgpack` objects can be concatenated in a stream.
+
+        **Returns:** The number of written bytes.
+        """
+        await self.open()
+        data_length = await self._file.write(b''.join(self._packer.pack(item) for item in items))
+        logger.debug('writing %s bytes in file %s', data_length, self._filename)
+        return data_length
+
+    async def close(self) -> None:
+        """Closes the underlying file."""
+        if self._file is not None:
+            logger.debug('closing file %s', self._filename)
+            await self._file.aclose()
+            self._file = None
+
+    async def __aenter__(self) -> 'AsyncMsgpackWriter':
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
 
 
 async def write_mp(filename: Union[str, Path], data: Any, mode: str = 'w', encoder: Callable = None) -> int:
@@ -68,17 +166,5 @@ async def write_mp(filename: Union[str, Path], data: Any, mode: str = 'w', encod
     print(length)  # 65
     ```
     """
-    if mode not in ['a', 'w']:
-        message = f'The only modes expected are "a" and "w" but you provided {mode}'
-        logger.exception(message)
-        raise TypeError(message)
-
-    if encoder is not None and not callable(encoder):
-        message = f'{encoder} is not callable'
-        logger.exception(message)
-        raise TypeError(message)
-
-    async with await anyio.open_file(filename, f'{mode}b') as f:
-        data_length = await f.write(msgpack.packb(data, default=encoder))
-        logger.debug('writing %s bytes in file %s', data_length, filename)
-        return data_length
+    async with AsyncMsgpackWriter(filename, mode, encoder) as writer:
+        return await writer.write(data)
@@ -3,19 +3,22 @@ from typing import Tuple
 
 import anyio
 from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
 
 logger = logging.getLogger('scalpel')
 
 
 class SeleniumGetMixin:
-    def _get_resource(self, url: str, error_message: str = '') -> Tuple[bool, float]:
+    async def _get_resource(self, driver: WebDriver, url: str, error_message: str = '') -> Tuple[bool, float]:
         fetch_time = 0
         unreachable = False
         if not error_message:
             error_message = f'unable to get resource at {url}'
         try:
             before = anyio.current_time()
-            self._driver.get(url)
+            # the page load blocks until the DOM is ready, so it happens in a worker thread to not block the event loop,
+            # a cancellation waits for the page load, otherwise the driver would be leased again while still in use
+            await anyio.to_thread.run_sync(driver.get, url)
             fetch_time = anyio.current_time() - before
         except WebDriverException:
             logger.exception(error_message)
@@ -1,6 +1,6 @@
 """Implementation of an anyio queue."""
 import logging
-from typing import Any, Iterable, Union
+from typing import Any, Iterable, List, Union
 
 import anyio
 import attr
@@ -83,8 +83,8 @@ class Queue:
         if self._items:
             logger.debug('trying to add items coming from list %s', self._items)
             for item in self._items:
-                self._tasks_in_progress += 1
                 self._send_channel.send_nowait(item)
+            self._tasks_in_progress = len(self._items)
 
     @_size.validator
     def _validate_size(self, _, value: int) -> None:
@@ -106,43 +106,88 @@ class Queue:
         logger.debug('returning queue max size: %s', self._size)
         return self._size
 
-    async def put(self, item: Any) -> None:
-        logger.debug('adding item %s to queue', item)
-        await self._send_channel.send(item)
+    def _add_task(self) -> None:
         self._tasks_in_progress += 1
-        logger.debug('number of tasks in progress is now: %s', self._tasks_in_progress)
-        if self._finished.is_set():
+        # queue methods are called several times per url, checking the level first saves the logging call when debug
+        # messages are not wanted
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('number of tasks in progress is now: %s', self._tasks_in_progress)
+        # the event is only set when there is no task in progress, so it needs to be replaced only when the first task
+        # is added after that, not for every item
+        if self._tasks_in_progress == 1 and self._finished.is_set():
             self._finished = anyio.Event()
 
+    async def put(self, item: Any) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('adding item %s to queue', item)
+        await self._send_channel.send(item)
+        self._add_task()
+
     def put_nowait(self, item: Any) -> None:
-        logger.debug('trying to add %s to queue', item)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('trying to add %s to queue', item)
         self._send_channel.send_nowait(item)
-        self._tasks_in_progress += 1
-        logger.debug('number of tasks in progress is now: %s', self._tasks_in_progress)
-        if self._finished.is_set():
-            self._finished = anyio.Event()
+        self._add_task()
+
+    async def put_many(self, items: Iterable[Any]) -> None:
+        """
+        Adds many items in the queue. Items are added without yielding to the event loop for each of them, only those
+        not fitting in the queue wait for a free slot like with `put`.
+
+        **Parameters:**
+
+        * **items:** The items to add.
+        """
+        await anyio.lowlevel.checkpoint()
+        for item in items:
+            try:
+                self._send_channel.send_nowait(item)
+            except anyio.WouldBlock:
+                await self.put(item)
+            else:
+                self._add_task()
 
     async def get(self) -> Any:
         item = await self._receive_channel.receive()
-        logger.debug('returning item %s from queue', item)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('returning item %s from queue', item)
         return item
 
+    async def get_many(self, max_items: int) -> List[Any]:
+        """
+        Waits for an item and returns it with the following ones already present in the queue.
+
+        **Parameters:**
+
+        * **max_items:** The maximum number of items to return.
+        """
+        items = [await self.get()]
+        while len(items) < max_items:
+            try:
+                items.append(self._receive_channel.receive_nowait())
+            except anyio.WouldBlock:
+                break
+        return items
+
     def get_nowait(self) -> Any:
-        logger.debug('trying to get item from queue')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('trying to get item from queue')
         return self._receive_channel.receive_nowait()
 
     def task_done(self) -> None:
         if self._tasks_in_progress <= 0:
             raise ValueError('task_done method was calling too many times without adding items in queue')
         self._tasks_in_progress -= 1
-        logger.debug('decrementing tasks in progress, now the new value is: %s', self._tasks_in_progress)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('decrementing tasks in progress, now the new value is: %s', self._tasks_in_progress)
         if self._tasks_in_progress == 0:
             self._finished.set()
 
     async def close(self) -> None:
         logger.debug('closing send and receive channels')
-        await self._send_channel.aclose()
-        await self._receive_channel.aclose()
+        # closing memory streams does not wait for anything, so their synchronous methods are called directly
+        self._send_channel.close()
+        self._receive_channel.close()
 
     async def join(self) -> None:
         logger.debug('waiting self._tasks_in_progress to be equal to 0')
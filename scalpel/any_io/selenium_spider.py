@@ -1,9 +1,13 @@
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
 
+import anyio
 import attr
-from rfc3986 import uri_reference
+from selenium.webdriver.remote.webdriver import WebDriver
 
 from scalpel.core.selenium import SeleniumDriverMixin
+from scalpel.core.spider import canonicalize_url, is_file_url
 
 from .mixins import SeleniumGetMixin
 from .response import SeleniumResponse
@@ -45,47 +49,79 @@ class SeleniumSpider(SeleniumGetMixin, StaticSpider, SeleniumDriverMixin):
     ```
     """
 
+    # drivers which are not used to handle an url, the semaphore tells how many of them are available
+    _free_drivers: List[WebDriver] = attr.ib(init=False, repr=False)
+    _driver_semaphore: anyio.Semaphore = attr.ib(init=False, repr=False)
+
+    @_free_drivers.default
+    def _get_free_drivers(self) -> List[WebDriver]:
+        return list(self._drivers)
+
+    @_driver_semaphore.default
+    def _get_driver_semaphore(self) -> anyio.Semaphore:
+        return anyio.Semaphore(len(self._drivers))
+
     def __attrs_post_init__(self):
         # this erases the content of StaticSpider.__attrs_post_init__ which is not useful here
         pass
 
-    def _get_selenium_response(self, handle: str) -> SeleniumResponse:
+    @asynccontextmanager
+    async def _lease_driver(self) -> AsyncIterator[WebDriver]:
+        async with self._driver_semaphore:
+            driver = self._free_drivers.pop()
+            try:
+                yield driver
+            finally:
+                self._free_drivers.append(driver)
+
+    def _get_selenium_response(self, driver: WebDriver, handle: str) -> SeleniumResponse:
         return SeleniumResponse(
-            self.reachable_urls, self.followed_urls, self._queue, driver=self._driver, handle=handle
+            self.reachable_urls,
+            self.followed_urls,
+            self._queue,
+            bloom=self._bloom,
+            driver=driver,
+            handle=handle,
+            find_timeout=self.config.selenium_find_timeout,
         )
 
     async def _cleanup(self) -> None:
-        self._driver.quit()
+        await self._close_items_streams()
+        for driver in self._drivers:
+            driver.quit()
         await self._http_client.aclose()
         await self._queue.close()
 
     # noinspection PyBroadException
     async def _handle_url(self, url: str) -> None:
-        if self._is_url_already_processed(url):
+        canonical_url = canonicalize_url(url)
+        if self._is_url_already_processed(canonical_url):
             return
 
-        ur = uri_reference(url)
         error_message = ''
-        if ur.scheme == 'file':
+        if is_file_url(url):
             error_message = f'unable to open file {url}'
 
-        unreachable, fetch_time = self._get_resource(url, error_message)
-        if unreachable:
-            self.unreachable_urls.add(url)
-            self._queue.task_done()
-            return
-        # we update some stats
-        self.request_counter += 1
-        self._total_fetch_time += fetch_time
-        self.reachable_urls.add(url)
-
-        handle = self._driver.current_window_handle
-        try:
-            await self.parse(self, self._get_selenium_response(handle))
-        except Exception:
-            logger.exception('something unexpected happened while parsing the content at url %s', url)
-            if not self._ignore_errors:
+        # the driver is kept until the page is parsed since the response relies on it
+        async with self._lease_driver() as driver:
+            unreachable, fetch_time = await self._get_resource(driver, url, error_message)
+            if unreachable:
+                self.unreachable_urls.add(canonical_url)
                 self._queue.task_done()
-                raise
-        self._queue.task_done()
+                return
+            # we update some stats
+            self.request_counter += 1
+            self._total_fetch_time += fetch_time
+            self.reachable_urls.add(canonical_url)
+
+            # like all driver commands, this is a http request to the browser driver
+            handle = await anyio.to_thread.run_sync(getattr, driver, 'current_window_handle')
+            try:
+                await self.parse(self, self._get_selenium_response(driver, handle))
+            except Exception:
+                logger.exception('something unexpected happened while parsing the content at url %s', url)
+                if not self._ignore_errors:
+                    self._queue.task_done()
+                    raise
+            self._queue.task_done()
         logger.info('content at url %s has been processed', url)
@@ -3,23 +3,35 @@ import math
 import platform
 from asyncio import iscoroutinefunction
 from pathlib import Path
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import anyio
 import attr
 import httpx
 from anyio.abc import TaskGroup
-from rfc3986 import uri_reference
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
-from scalpel.core.spider import Spider
+from scalpel.core.bloom import BloomFilter
+from scalpel.core.http import get_ssl_context
+from scalpel.core.io import read_text_file
+from scalpel.core.spider import DEFERRED_URLS_LIMIT, Spider, canonicalize_url, is_file_url
 
-from .files import write_mp
+from .files import AsyncMsgpackWriter
 from .queue import Queue
 from .response import StaticResponse
 from .robots import RobotsAnalyzer
 
 logger = logging.getLogger('scalpel')
 
+# the platform does not change while the program runs, so there is no need to check it for each file url
+_IS_WINDOWS = platform.system() == 'Windows'
+# urls are handled by as many tasks as needed, so more idle connections than the httpx default (20) are kept to be
+# reused by the next requests instead of opening new ones
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+# number of saved items waiting for the writer task before save_item itself waits
+ITEMS_STREAM_SIZE = 1024
+
 
 @attr.s(slots=True)
 class StaticSpider(Spider):
@@ -56,8 +68,17 @@ class StaticSpider(Spider):
     _http_client: httpx.AsyncClient = attr.ib(init=False, repr=False)
     _robots_analyser: RobotsAnalyzer = attr.ib(init=False, repr=False)
     _fetch: Callable = attr.ib(init=False, repr=False)
-    _lock: anyio.Lock = attr.ib(init=False, repr=False, factory=anyio.Lock)
     _queue: Queue = attr.ib(init=False, repr=False)
+    _bloom: Optional[BloomFilter] = attr.ib(init=False, repr=False)
+    _items_buffer: List[Any] = attr.ib(factory=list, init=False, repr=False)
+    _last_flush: float = attr.ib(init=False, repr=False, factory=anyio.current_time)
+    # the receive stream is created with the send one by its default method
+    _items_send_stream: MemoryObjectSendStream = attr.ib(init=False, repr=False)
+    _items_receive_stream: MemoryObjectReceiveStream = attr.ib(init=False, repr=False)
+    # without a writer task, nothing reads the items stream, so saved items are buffered and flushed directly
+    _is_writer_running: bool = attr.ib(default=False, init=False, repr=False)
+    _item_processors: List[Tuple[Callable, bool]] = attr.ib(init=False, repr=False)
+    _deferred_urls: anyio.Semaphore = attr.ib(init=False, repr=False)
 
     def __attrs_post_init__(self):
         async def _get_fetch(url: str) -> httpx.Response:
@@ -71,10 +92,17 @@ class StaticSpider(Spider):
     def _get_http_client(self) -> httpx.AsyncClient:
         headers = {'User-Agent': self.config.user_agent}
         logger.debug('getting a default httpx client with user agent: %s', self.config.user_agent)
-        return httpx.AsyncClient(headers=headers, timeout=self.config.fetch_timeout)
+        return httpx.AsyncClient(
+            headers=headers,
+            timeout=self.config.fetch_timeout,
+            limits=HTTP_LIMITS,
+            http2=self.config.http2,
+            verify=get_ssl_context(self.config.http2),
+        )
 
     @_robots_analyser.default
     def _get_robots_analyzer(self) -> RobotsAnalyzer:
+        # the analyzer shares the spider client, so robots.txt files and pages of a host use the same connections
         logger.debug('getting a default robots analyzer')
         return RobotsAnalyzer(
             http_client=self._http_client,
@@ -85,21 +113,58 @@ class StaticSpider(Spider):
     @_queue.default
     def _get_queue(self) -> Queue:
         logger.debug('getting a default queue')
-        return Queue(size=math.inf, items=self.urls)
+        if self.config.queue_maxsize is None:
+            return Queue(size=math.inf, items=self.urls)
+        # start urls must all fit in the queue, otherwise we will have an anyio.WouldBlock exception
+        return Queue(size=max(self.config.queue_maxsize, len(self.urls)), items=self.urls)
+
+    @_items_send_stream.default
+    def _get_items_streams(self) -> MemoryObjectSendStream:
+        send_stream, self._items_receive_stream = anyio.create_memory_object_stream(ITEMS_STREAM_SIZE)
+        return send_stream
+
+    @_deferred_urls.default
+    def _get_deferred_urls_semaphore(self) -> anyio.Semaphore:
+        return anyio.Semaphore(DEFERRED_URLS_LIMIT)
+
+    @_item_processors.default
+    def _get_item_processors(self) -> List[Tuple[Callable, bool]]:
+        # processors do not change during a run, so there is no need to check if they are coroutines for each item
+        return [(processor, iscoroutinefunction(processor)) for processor in self.config.item_processors]
+
+    @_bloom.default
+    def _get_bloom(self) -> Optional[BloomFilter]:
+        if self.config.bloom_capacity is None:
+            return
+        logger.debug('getting a bloom filter with a capacity of %s urls', self.config.bloom_capacity)
+        return BloomFilter(self.config.bloom_capacity, self.config.bloom_error_rate)
 
     def _get_static_response(
         self, url: str = '', text: str = '', httpx_response: httpx.Response = None
     ) -> StaticResponse:
+        # only the text length is logged, a page body in the log arguments is useless and costly if formatted
         logger.debug(
-            'returning StaticResponse object with url: %s, text: %s and httpx_response: %s', url, text, httpx_response
+            'returning StaticResponse object with url: %s, text of length %s and httpx_response: %s',
+            url,
+            len(text),
+            httpx_response,
         )
         return StaticResponse(
-            self.reachable_urls, self.followed_urls, self._queue, url=url, text=text, httpx_response=httpx_response
+            self.reachable_urls,
+            self.followed_urls,
+            self._queue,
+            bloom=self._bloom,
+            url=url,
+            text=text,
+            httpx_response=httpx_response,
         )
 
-    def _is_url_already_processed(self, url: str) -> False:
+    def _is_url_already_processed(self, url: str) -> bool:
         processed = False
-        if url in [*self.reachable_urls, *self.unreachable_urls, *self.robots_excluded_urls]:
+        # a bloom filter never gives false negatives, so an url it does not know is not in the url sets either
+        if self._bloom is not None and url not in self._bloom:
+            self._bloom.add(url)
+        elif url in self.reachable_urls or url in self.unreachable_urls or url in self.robots_excluded_urls:
             logger.debug('url %s has already been processed', url)
             self._queue.task_done()
             processed = True
@@ -107,36 +172,37 @@ class StaticSpider(Spider):
 
     # noinspection PyBroadException
     async def _handle_url(self, url: str) -> None:
-        if self._is_url_already_processed(url):
+        # the canonical form is the one stored in url sets, so that duplicates are detected
+        canonical_url = canonicalize_url(url)
+        if self._is_url_already_processed(canonical_url):
             return
 
         static_url = text = ''
         response: Optional[httpx.Response] = None
-        ur = uri_reference(url)
-        if ur.scheme == 'file':
+        if is_file_url(url):
             static_url = url
-            logger.debug('url %s is a file url so we attempt to read its content')
-            file_path = ur.path[1:] if platform.system() == 'Windows' else ur.path
+            logger.debug('url %s is a file url so we attempt to read its content', url)
+            path = urlsplit(url).path
+            file_path = path[1:] if _IS_WINDOWS else path
             try:
                 before = anyio.current_time()
-                async with await anyio.open_file(file_path) as f:
-                    text = await f.read()
+                text = await anyio.to_thread.run_sync(read_text_file, file_path)
                 fetch_time = anyio.current_time() - before
             except OSError:
                 logger.exception('unable to open file %s', url)
-                self.unreachable_urls.add(url)
+                self.unreachable_urls.add(canonical_url)
                 return
         else:
             response: httpx.Response = await self._fetch(url)
             if response.is_error:
                 logger.info('fetching url %s returns an error with status code %s', url, response.status_code)
-                self.unreachable_urls.add(url)
+                self.unreachable_urls.add(canonical_url)
                 return
             fetch_time = response.elapsed.total_seconds()
 
         # we update some variables for statistics
         self.request_counter += 1
-        self.reachable_urls.add(url)
+        self.reachable_urls.add(canonical_url)
         self._total_fetch_time += fetch_time
 
         try:
@@ -149,55 +215,167 @@ class StaticSpider(Spider):
         self._queue.task_done()
         logger.info('content at url %s has been processed', url)
 
-    async def save_item(self, item: Any) -> None:
-        item_rejected = False
+    async def _process_item(self, item: Any) -> Any:
+        """Passes an item through item processors and returns the result or `None` if one of them rejected it."""
         original_item = item
-        for processor in self.config.item_processors:
-            if iscoroutinefunction(processor):
+        for processor, is_coroutine in self._item_processors:
+            if is_coroutine:
                 item = await processor(item)
             else:
                 item = processor(item)
             if item is None:
-                item_rejected = True
-                break
-        if item_rejected:
-            logger.debug('item %s was rejected', original_item)
+                logger.debug('item %s was rejected', original_item)
+                return
+        return item
+
+    async def save_item(self, item: Any) -> None:
+        """Saves a scrapped item in the backup filename specified in `Configuration.backup_filename` attribute."""
+        item = await self._process_item(item)
+        if item is None:
             return
 
-        logger.debug('writing item %s to file %s', item, self.config.backup_filename)
-        async with self._lock:
-            await write_mp(self.config.backup_filename, item, mode='a', encoder=self.config.msgpack_encoder)
+        if not self._is_writer_running:
+            await self._buffer_items([item])
+            return
+        logger.debug('sending item %s to the task writing file %s', item, self.config.backup_filename)
+        await self._items_send_stream.send(item)
+
+    async def save_items(self, items: Iterable[Any]) -> None:
+        """
+        Saves many scrapped items in the backup filename specified in `Configuration.backup_filename` attribute. Items
+        are sent to the writer task without yielding to the event loop for each of them, only those not fitting in the
+        stream wait for a free slot like with `save_item`.
+
+        **Parameters:**
+
+        * **items:** The items to save.
+        """
+        await anyio.lowlevel.checkpoint()
+        buffered_items = []
+        for item in items:
+            item = await self._process_item(item)
+            if item is None:
+                continue
+            if not self._is_writer_running:
+                buffered_items.append(item)
+                continue
+            try:
+                self._items_send_stream.send_nowait(item)
+            except anyio.WouldBlock:
+                await self._items_send_stream.send(item)
+        if buffered_items:
+            await self._buffer_items(buffered_items)
+
+    async def _buffer_items(self, items: List[Any]) -> None:
+        logger.debug('buffering %s items before writing them to file %s', len(items), self.config.backup_filename)
+        self._items_buffer.extend(items)
+        if self._is_flush_due():
+            await self._flush_items()
+
+    def _is_flush_due(self) -> bool:
+        if len(self._items_buffer) >= self.config.backup_batch_size:
+            return True
+        flush_interval = self.config.backup_flush_interval
+        return flush_interval is not None and anyio.current_time() - self._last_flush >= flush_interval
+
+    async def _write_items(self) -> None:
+        """Writes items sent by save_item in the backup file until the send stream is closed."""
+        # while running, this is the only task touching the buffer, parse functions only wait for the disk when the
+        # stream is full
+        self._is_writer_running = True
+        try:
+            async for item in self._items_receive_stream:
+                self._items_buffer.append(item)
+                if self._is_flush_due():
+                    await self._flush_items()
+            await self._flush_items()
+        finally:
+            self._is_writer_running = False
+
+    async def _close_items_streams(self) -> None:
+        await self._items_send_stream.aclose()
+        # items saved while no writer task was running are written here, otherwise the stream is already empty
+        await self._write_items()
+        await self._items_receive_stream.aclose()
+
+    async def _flush_items(self) -> None:
+        """Writes buffered items in the backup file in one go."""
+        if not self._items_buffer:
+            return
+        logger.debug('writing %s items to file %s', len(self._items_buffer), self.config.backup_filename)
+        # a cancelled write would leave a truncated item in the file and the whole batch in the buffer
+        with anyio.CancelScope(shield=True):
+            async with AsyncMsgpackWriter(self.config.backup_filename, encoder=self.config.msgpack_encoder) as writer:
+                await writer.writemany(self._items_buffer)
+            self._items_buffer.clear()
+            self._last_flush = anyio.current_time()
 
     async def _get_request_delay(self, url: str) -> Union[int, float]:
         if self.config.follow_robots_txt:
             return await self._robots_analyser.get_request_delay(url, self.config.request_delay)
-        await anyio.sleep(0)  # checkpoint to ensure an async function in every case
+        # no checkpoint here, the worker already yields to the event loop when it takes an url from the queue
         return self.config.request_delay
 
+    async def _handle_url_later(self, url: str, start_time: float) -> None:
+        try:
+            await anyio.sleep_until(start_time)
+        finally:
+            # the url is no longer waiting, so the worker can defer another one
+            self._deferred_urls.release()
+        await self._handle_url(url)
+
     async def worker(self, task_group: TaskGroup) -> None:
         while True:
             url = await self._queue.get()
             request_delay = await self._get_request_delay(url)
             if request_delay == -1:  # url is not accessible
-                self.robots_excluded_urls.add(url)
+                self.robots_excluded_urls.add(canonicalize_url(url))
                 self._queue.task_done()
                 continue
 
-            task_group.start_soon(self._handle_url, url)
-            await anyio.sleep(request_delay)
+            # the worker does not sleep itself, otherwise the delay of one host would hold back urls of all hosts
+            now = anyio.current_time()
+            wait_time = self._get_host_wait_time(url, request_delay, now)
+            if wait_time:
+                # deferred urls are bounded, otherwise the worker would empty the queue in tasks waiting for a slow host
+                await self._deferred_urls.acquire()
+                task_group.start_soon(self._handle_url_later, url, now + wait_time)
+            else:
+                task_group.start_soon(self._handle_url, url)
 
     async def _cleanup(self) -> None:
+        await self._close_items_streams()
         await self._http_client.aclose()
         await self._queue.close()
 
+    async def _prefetch_robots(self) -> None:
+        urls = self._get_robots_prefetch_urls()
+        logger.debug('prefetching robots.txt files of %s hosts', len(urls))
+        # robots.txt files of the different hosts are fetched concurrently instead of one after the other
+        async with anyio.create_task_group() as tg:
+            for url in urls:
+                tg.start_soon(self._robots_analyser.prefetch, url, self.config.request_delay)
+
     # noinspection PyAsyncCall
     async def run(self) -> None:
         """Runs the spider."""
-        async with anyio.create_task_group() as tg:
-            tg.start_soon(self.worker, tg)
-            await self._queue.join()
-            # at this point, all the urls were handled, so the only remaining task is the worker
-            tg.cancel_scope.cancel()
-
-        await self._cleanup()
+        try:
+            async with anyio.create_task_group() as items_tg:
+                items_tg.start_soon(self._write_items)
+                async with anyio.create_task_group() as tg:
+                    # the crawl does not wait for all robots.txt files, the worker only waits for the one of its
+                    # current url
+                    if self.config.follow_robots_txt:
+                        tg.start_soon(self._prefetch_robots)
+                    tg.start_soon(self.worker, tg)
+                    await self._queue.join()
+                    # at this point, all the urls were handled, so the only remaining task is the worker
+                    tg.cancel_scope.cancel()
+                # the writer task ends after writing the remaining items
+                await self._items_send_stream.aclose()
+        finally:
+            # if a parse function raised an error, the writer task was cancelled with items left in the stream and
+            # in the buffer, they are written here even if the spider itself is cancelled
+            with anyio.CancelScope(shield=True):
+                await self._cleanup()
         self._duration = anyio.current_time() - self._start_time
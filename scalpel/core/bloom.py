@@ -0,0 +1,51 @@
+"""A minimal bloom filter used to quickly discard urls never seen by a spider."""
+import hashlib
+import logging
+import math
+from typing import Iterator
+
+import attr
+
+logger = logging.getLogger('scalpel')
+
+
+@attr.s(slots=True)
+class BloomFilter:
+    """
+    A probabilistic set of strings. It never gives false negatives, i.e if an item is not in the filter it was never
+    added, but it can give false positives with a probability close to `error_rate` as long as no more than `capacity`
+    items are added. Past this limit, the error rate grows but the filter still works.
+
+    **Parameters:**
+
+    * **capacity:** The number of items the filter is sized for.
+    * **error_rate:** The expected rate of false positives. Defaults to 0.01.
+    """
+
+    capacity: int = attr.ib(validator=attr.validators.instance_of(int))
+    error_rate: float = attr.ib(default=0.01, validator=attr.validators.instance_of(float))
+    _size: int = attr.ib(init=False)
+    _hash_count: int = attr.ib(init=False)
+    _bits: bytearray = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        # classic formulas giving the optimal number of bits and hash functions for the expected error rate
+        self._size = max(8, math.ceil(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2))
+        self._hash_count = max(1, round(self._size / self.capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        logger.debug('bloom filter initialized with %s bits and %s hash functions', self._size, self._hash_count)
+
+    def _get_positions(self, item: str) -> Iterator[int]:
+        # double hashing: the k positions are derived from two independent 64-bit values
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self._hash_count):
+            yield (first_hash + i * second_hash) % self._size
+
+    def add(self, item: str) -> None:
+        for position in self._get_positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._get_positions(item))
@@ -4,6 +4,7 @@ import re
 import tempfile
 import uuid
 from enum import Enum, auto
+from functools import lru_cache
 from importlib import import_module
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -16,6 +17,9 @@ from .message_pack import datetime_decoder, datetime_encoder
 
 logger = logging.getLogger('scalpel')
 
+# enough urls to keep the spider busy while keeping the memory used by the queue of a deep crawl flat
+DEFAULT_QUEUE_MAXSIZE = 10_000
+
 
 def check_value_greater_or_equal_than_0(_, attribute: attr.Attribute, value: int) -> None:
     if value < 0:
@@ -24,6 +28,20 @@ def check_value_greater_or_equal_than_0(_, attribute: attr.Attribute, value: int
         raise ValueError(message)
 
 
+def check_value_greater_than_0(_, attribute: attr.Attribute, value: int) -> None:
+    if value <= 0:
+        message = f'{attribute.name} must be strictly positive'
+        logger.exception(message)
+        raise ValueError(message)
+
+
+def check_value_between_0_and_1(_, attribute: attr.Attribute, value: float) -> None:
+    if not 0 < value < 1:
+        message = f'{attribute.name} must be between 0 and 1 (both excluded)'
+        logger.exception(message)
+        raise ValueError(message)
+
+
 def check_max_delay_greater_or_equal_than_min_delay(
     instance: 'Configuration', attribute: attr.Attribute, value: int
 ) -> None:
@@ -47,6 +65,18 @@ def check_driver_presence(config: 'Configuration', attribute: attr.Attribute, fi
     check_file_presence(config, attribute, filename)
 
 
+def check_http2_support(_, attribute: attr.Attribute, value: bool) -> None:
+    if not value:
+        return
+    try:
+        import_module('h2')
+    except ImportError:
+        logger.exception(
+            f'{attribute.name} requires the h2 package, you can install it with "pip install httpx[http2]"'
+        )
+        raise
+
+
 def validate_robots_folder(_, attribute: attr.Attribute, path: Path) -> None:
     if not path.exists():
         message = f'{attribute.name} does not exist'
@@ -156,6 +186,7 @@ def browser_converter(value: Any) -> Any:
 
 
 positive_int_validators = [attr.validators.instance_of(int), check_value_greater_or_equal_than_0]
+strictly_positive_int_validators = [attr.validators.instance_of(int), check_value_greater_than_0]
 max_delay_validators = [*positive_int_validators, check_max_delay_greater_or_equal_than_min_delay]
 positive_float_validators = [attr.validators.instance_of(float), check_value_greater_or_equal_than_0]
 middleware_validator = attr.validators.deep_iterable(
@@ -163,6 +194,20 @@ middleware_validator = attr.validators.deep_iterable(
 )
 backup_filename_validators = [attr.validators.instance_of(str), check_file_can_be_created]
 selenium_path_validators = [attr.validators.optional(attr.validators.instance_of(str)), check_file_can_be_created]
+optional_strictly_positive_int_validator = attr.validators.optional(
+    attr.validators.and_(*strictly_positive_int_validators)
+)
+optional_strictly_positive_float_validator = attr.validators.optional(
+    attr.validators.and_(attr.validators.instance_of(float), check_value_greater_than_0)
+)
+bloom_error_rate_validators = [attr.validators.instance_of(float), check_value_between_0_and_1]
+
+
+# fake_useragent reads its browser data from a cache file (or downloads it when the file is missing) each time a
+# UserAgent object is created, so one object is shared by all configurations
+@lru_cache(maxsize=None)
+def _get_fake_user_agent() -> UserAgent:
+    return UserAgent()
 
 
 @attr.s(frozen=True)
@@ -172,14 +217,15 @@ class Configuration:
 
     **Parameters:**
 
-    * **min_request_delay:** The minimum delay to wait between two http requests. Defaults to 0s.
+    * **min_request_delay:** The minimum delay to wait between two http requests to a same host. Defaults to 0s.
 
-    * **max_request_delay:** The maximum delay to wait between two http requests. Defaults to 0s.
+    * **max_request_delay:** The maximum delay to wait between two http requests to a same host. Defaults to 0s.
 
     * **fetch_timeout:** The timeout to fetch http resources using the inner
     [httpx](https://www.python-httpx.org/) client. Defaults to 5s.
 
-    * **selenium_find_timeout:** The timeout for selenium driver to find an element in a page. Defaults to 10s.
+    * **selenium_find_timeout:** The timeout for selenium driver to find an element in a page. It is also the default
+    timeout of `SeleniumResponse.wait_for`. Defaults to 10s.
 
     * **selenium_driver_log_file:** The file where the browser log debug messages. Defaults to *driver.log*.
     If you want to not create one, just pass `None`.
@@ -190,6 +236,10 @@ class Configuration:
     * **selenium_driver_executable_path:** The path to the browser driver. Defaults to *geckodriver* if
     `Browser.FIREFOX` is selected as *selenium_browser*, otherwise defaults to *chromedriver*.
 
+    * **selenium_pool_size:** The number of browsers started by the selenium spiders. Each url is fetched and parsed
+    with a browser of this pool, so this is the maximum number of urls handled concurrently by these spiders. Keep in
+    mind that each browser uses a lot of memory. Defaults to 1.
+
     * **user_agent:** The user agent to fake. Mainly useful for the static spider. Defaults to a random value provided
     by [fake-useragent](https://pypi.org/project/fake-useragent/) and if it does not work, fallback to
     *Mozilla/5.0 (Windows NT 6.3; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/41.0.2225.0 Safari/537.36*
@@ -198,12 +248,22 @@ class Configuration:
     scraping. Defaults to `False`.
 
     * **robots_cache_folder:** A folder to cache content of different website robots.txt file to avoid retrieving
-    it each time you want to analyze an html page. Default to the system temporary directory.
+    it each time you want to analyze an html page. Files written in this folder by a previous run are reused while they
+    are less than 24 hours old. Default to a new folder in the system temporary directory.
 
     * **backup_filename:** The filename were scraped items will be written. If you don't want one, simple pass `None`.
     Defaults to *backup-{uuid}.mp* where uuid is a `uuid.uuid4` string value. Note that values inserted in this file
     are streamed using `msgpack`. Look at the documentation to see how to use it.
 
+    * **backup_batch_size:** The number of scraped items kept in memory before being written in the backup file
+    in one go. Remaining items are written when the spider stops. Defaults to 1 i.e each item is written as soon as it
+    is saved.
+
+    * **backup_flush_interval:** The number of seconds after which items kept in memory because of
+    *backup_batch_size* are written in the backup file even if the batch is not full. It is checked each time an item
+    is saved, so items saved before a long pause are only written with the next ones or when the spider stops.
+    Defaults to `None` meaning items are only written when the batch is full.
+
     * **response_middlewares:** A list of callables that will be called with the callable that fetch the http resource.
     This parameter is only useful for the **static spider**. Defaults to an empty list.
 
@@ -215,6 +275,30 @@ class Configuration:
     * **msgpack_decoder:** A callable that will be called when `msgpack` deserializes an item.
     Defaults to `scalpel.datetime_decoder`.
 
+    * **bloom_capacity:** The number of urls a bloom filter is sized for. When set, this filter is checked before
+    the spider url sets to know if an url was already processed, which is faster on huge crawls. Defaults to `None`
+    meaning no bloom filter is used.
+
+    * **bloom_error_rate:** The expected false positive rate of the bloom filter. A false positive only costs a lookup
+    in the spider url sets. Defaults to 0.01.
+
+    * **pool_size:** The maximum number of urls handled concurrently by the gevent pool of the **green** spiders. The
+    httpx client connection pool is another limit to consider when raising this value. Be careful when setting it with
+    `queue_maxsize`, if all the greenlets of the pool wait to follow urls on a full queue, the spider will hang. This is
+    why the queue is not bounded by default when this value is set.
+    Defaults to `None` meaning there is no limit.
+
+    * **queue_maxsize:** The maximum number of urls waiting in the spider queue. When the queue is full, calls to
+    `response.follow` wait until the spider takes an url from the queue, which caps the memory used by deep crawls but
+    slows down parse functions following many urls. Start urls are always added to the queue, even if they are more
+    than this value. Set it to `None` if you don't want to bound the queue. Defaults to 10000 or to `None` if
+    `pool_size` is set.
+
+    * **http2:** Decide whether or not the httpx client of the **static** spiders should use HTTP/2 when the server
+    supports it. It allows many requests to be sent on the same connection to a given host, but requires the
+    [h2](https://pypi.org/project/h2/) package which you can install with `pip install httpx[http2]`.
+    Defaults to `False`.
+
     Usage:
 
     ```
@@ -239,12 +323,17 @@ class Configuration:
     selenium_driver_executable_path: str = attr.ib(
         converter=str_converter, validator=[attr.validators.instance_of(str), check_driver_presence]
     )
+    selenium_pool_size: int = attr.ib(default=1, converter=int, validator=strictly_positive_int_validators)
     user_agent: str = attr.ib(validator=attr.validators.instance_of(str))
     follow_robots_txt: bool = attr.ib(
         default=False, converter=bool_converter, validator=attr.validators.instance_of(bool)
     )
     robots_cache_folder: Path = attr.ib(converter=Path, validator=validate_robots_folder)
     backup_filename: str = attr.ib(validator=backup_filename_validators)
+    backup_batch_size: int = attr.ib(default=1, converter=int, validator=strictly_positive_int_validators)
+    backup_flush_interval: Optional[float] = attr.ib(
+        default=None, converter=attr.converters.optional(float), validator=optional_strictly_positive_float_validator
+    )
     response_middlewares: List[Callable] = attr.ib(
         repr=False, converter=callable_list_converter, factory=list, validator=middleware_validator
     )
@@ -257,11 +346,31 @@ class Configuration:
     msgpack_decoder: Callable = attr.ib(
         repr=False, converter=msgpack_converter, default=datetime_decoder, validator=attr.validators.is_callable()
     )
+    bloom_capacity: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int), validator=optional_strictly_positive_int_validator
+    )
+    bloom_error_rate: float = attr.ib(default=0.01, converter=float, validator=bloom_error_rate_validators)
+    pool_size: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int), validator=optional_strictly_positive_int_validator
+    )
+    queue_maxsize: Optional[int] = attr.ib(
+        converter=attr.converters.optional(int), validator=optional_strictly_positive_int_validator
+    )
+    http2: bool = attr.ib(
+        default=False, converter=bool_converter, validator=[attr.validators.instance_of(bool), check_http2_support]
+    )
+
+    @queue_maxsize.default
+    def _get_default_queue_maxsize(self) -> Optional[int]:
+        # with a bounded pool, greenlets waiting on a full queue can prevent the spider from taking new urls
+        if self.pool_size is not None:
+            return None
+        return DEFAULT_QUEUE_MAXSIZE
 
     @user_agent.default
     def _get_default_user_agent(self) -> str:
         try:
-            ua = UserAgent()
+            ua = _get_fake_user_agent()
             user_agent = ua.random
             logger.debug('returning a random user agent: %s', user_agent)
             return user_agent
@@ -308,7 +417,8 @@ class Configuration:
         # ignore this warning.
         # More about the warning: https://bandit.readthedocs.io/en/latest/blacklists/blacklist_calls.html#b311-random
         delay = random.randint(self.min_request_delay, self.max_request_delay)  # nosec
-        logger.debug('returning computed request delay: %s s', delay)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('returning computed request delay: %s s', delay)
         return delay
 
     @staticmethod
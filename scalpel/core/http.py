@@ -0,0 +1,18 @@
+"""Helper shared by the httpx clients of spiders and robots analyzers"""
+import ssl
+from functools import lru_cache
+
+import httpx
+
+
+@lru_cache(maxsize=2)
+def get_ssl_context(http2: bool = False) -> ssl.SSLContext:
+    """
+    Returns the SSL context given to httpx clients. Loading the certificates of a default SSL context takes tens of
+    milliseconds, so it is done once per process for each value of `http2` instead of once per client. There is one
+    context per value because the protocols negotiated with servers are set on it.
+    """
+    context = httpx.create_ssl_context()
+    if http2:
+        context.set_alpn_protocols(['http/1.1', 'h2'])
+    return context
@@ -0,0 +1,12 @@
+"""Helper to read local files targeted by file urls"""
+import os
+from typing import Union
+
+
+def read_text_file(path: Union[str, os.PathLike]) -> str:
+    """
+    Reads the whole content of a text file. It is a blocking function meant to be run in a thread by spiders, so that
+    opening, reading and closing the file only cost one dispatch to the thread.
+    """
+    with open(path) as f:
+        return f.read()
@@ -1,15 +1,34 @@
 import logging
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 import attr
 import httpx
 import parsel
-from rfc3986 import uri_reference
+from rfc3986 import URIReference, uri_reference
 from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
 
 logger = logging.getLogger('scalpel')
 
 
+@lru_cache(maxsize=256)
+def _parse_base_url(base_url: str) -> URIReference:
+    # all the links of a page are resolved against the page url, so it is parsed once instead of once per link
+    return uri_reference(base_url)
+
+
+@lru_cache(maxsize=8192)
+def _resolve_url(base_url: str, url: str) -> str:
+    # links found in a page are often repeated (menus, pagination), so resolved urls are cached by (base, url) pairs
+    uri = uri_reference(url)
+    if uri.is_absolute():
+        return url
+    return uri.resolve_with(_parse_base_url(base_url)).copy_with(fragment=None).unsplit()
+
+
 @attr.s(kw_only=True)
 class BaseStaticResponse:
     _url: str = attr.ib(default='', validator=attr.validators.optional(attr.validators.instance_of(str)))
@@ -17,7 +36,10 @@ class BaseStaticResponse:
     _httpx_response: Optional[httpx.Response] = attr.ib(
         default=None, validator=attr.validators.optional(attr.validators.instance_of(httpx.Response))
     )
-    _selector: parsel.Selector = attr.ib(init=False)
+    # the selector parses the whole page, so it is only built when css or xpath methods are used
+    _parsel_selector: Optional[parsel.Selector] = attr.ib(init=False, default=None, repr=False)
+    # cookies are read from set-cookie headers, so the dict is only built on the first access of the cookies property
+    _cookies: Optional[Dict[str, str]] = attr.ib(init=False, default=None, repr=False)
 
     @property
     def url(self) -> str:
@@ -46,7 +68,7 @@ class BaseStaticResponse:
             _text = self._text
         else:
             _text = self._httpx_response.text
-        logger.debug('returning response text content:\n %s', _text)
+        logger.debug('returning response text content of length %s', len(_text))
         return _text
 
     @property
@@ -56,23 +78,24 @@ class BaseStaticResponse:
             _content = self._text.encode(errors='replace')
         else:
             _content = self._httpx_response.content
-        logger.debug('returning response byte content:\n %s', _content)
+        logger.debug('returning response byte content of length %s', len(_content))
         return _content
 
     @property
     def cookies(self) -> Dict[str, str]:
         """A `dict` of cookies associated to the response in case of an HTTP url. Empty `dict` otherwise."""
-        if self._url:
-            _cookies = {}
-        else:
-            _cookies = dict(self._httpx_response.cookies)
-        logger.debug('returning response cookies: %s', _cookies)
-        return _cookies
+        if self._cookies is None:
+            self._cookies = {} if self._url else dict(self._httpx_response.cookies)
+        logger.debug('returning response cookies: %s', self._cookies)
+        return self._cookies
 
-    @_selector.default
-    def _get_selector(self) -> parsel.Selector:
-        logger.debug('creating parsel selector with text:\n %s', self.text)
-        return parsel.Selector(self.text)
+    @property
+    def _selector(self) -> parsel.Selector:
+        if self._parsel_selector is None:
+            text = self.text
+            logger.debug('creating parsel selector with text of length %s', len(text))
+            self._parsel_selector = parsel.Selector(text)
+        return self._parsel_selector
 
     def css(self, query: str) -> parsel.SelectorList:
         """
@@ -104,15 +127,9 @@ class BaseStaticResponse:
         """
         This method returns absolute url from local or http urls.
         """
-        current_uri = uri_reference(self._url) if self._url else uri_reference(str(self._httpx_response.url))
-        given_uri = uri_reference(url)
-        if given_uri.is_absolute():
-            _url = url
-        else:
-            uri = given_uri.resolve_with(current_uri)
-            uri = uri.copy_with(fragment=None)
-            _url = uri.unsplit()
-        logger.debug('returning computed absolute url: %s', _url)
+        _url = _resolve_url(self._url or str(self._httpx_response.url), url)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('returning computed absolute url: %s', _url)
         return _url
 
 
@@ -120,20 +137,32 @@ class BaseStaticResponse:
 class BaseSeleniumResponse:
     driver: WebDriver = attr.ib(validator=attr.validators.instance_of(WebDriver))
     handle: str = attr.ib(validator=attr.validators.instance_of(str))
+    find_timeout: float = attr.ib(default=10.0, validator=attr.validators.instance_of((int, float)))
+
+    def wait_for(self, locator: Tuple[str, str], timeout: Optional[float] = None) -> WebElement:
+        """
+        Waits for an element to be present in the current page and returns it.
+
+        **Parameters:**
+
+        * **locator:** A tuple `(by, value)` used to find the element, e.g `(By.CSS_SELECTOR, 'p.title')`.
+        * **timeout:** The number of seconds to wait before raising a `selenium.common.exceptions.TimeoutException`.
+        Defaults to the `find_timeout` attribute.
+        """
+        timeout = self.find_timeout if timeout is None else timeout
+        logger.debug('waiting at most %s seconds for element located by %s', timeout, locator)
+        return WebDriverWait(self.driver, timeout).until(expected_conditions.presence_of_element_located(locator))
 
     def _get_absolute_url(self, url: str) -> str:
         """
         This method returns absolute url from local or http urls.
         """
-        uri = uri_reference(url)
-        if uri.is_absolute():
+        if uri_reference(url).is_absolute():
             _url = url
         else:
             # this is probably useless because I checked with firefox and chrome and both
             # computes absolute urls when they encounter a relative one, but to remove any doubt, let's do this
-            current_uri = uri_reference(self.driver.current_url)
-            uri = uri.resolve_with(current_uri)
-            uri = uri.copy_with(fragment=None)
-            _url = uri.unsplit()
-        logger.debug('returning computed absolute url: %s', _url)
+            _url = _resolve_url(self.driver.current_url, url)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('returning computed absolute url: %s', _url)
         return _url
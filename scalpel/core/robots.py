@@ -1,11 +1,63 @@
 import logging
+import re
+import time
+from pathlib import Path
 from typing import Dict, Union
 from urllib.robotparser import RobotFileParser
 
 logger = logging.getLogger(__name__)
 
+# number of seconds after which the robots.txt file of a host is fetched again
+ROBOTS_CACHE_TTL = 24 * 3600
+# number of seconds during which a host denying access to its robots.txt file (or not reachable) is not asked again
+ROBOTS_NEGATIVE_CACHE_TTL = 3600
+# robots.txt files are written in the cache folder with this suffix, so that other files of this folder are never
+# loaded as robots.txt files of a host
+ROBOTS_FILE_SUFFIX = '.robots.txt'
+# only files named after a valid (ascii) hostname are loaded from the cache folder
+HOSTNAME_REGEX = re.compile(r'[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?)*')
+
 
 class RobotsMixin:
+    def _purge_expired_robots_cache(self, host: str) -> None:
+        # entries without expiry time, like the robots files given at initialization, never expire
+        now = time.monotonic()
+        for expiry in (self._robots_expiry.get(host), self._negative_cache.get(host)):
+            if expiry is not None and expiry <= now:
+                logger.debug('robots.txt information of host %s has expired', host)
+                for mapping in (
+                    self._robots_expiry,
+                    self._negative_cache,
+                    self._robots_mapping,
+                    self._robots_parsers,
+                    self._delay_mapping,
+                ):
+                    mapping.pop(host, None)
+                return
+
+    def _get_robots_path(self, host: str) -> Path:
+        return self._robots_cache / f'{host}{ROBOTS_FILE_SUFFIX}'
+
+    def _load_robots_cache_folder(self) -> None:
+        # files written by a previous run are named after their host, they are used until they are as old as the ones
+        # fetched during this run, their content is only read when the host is met
+        now = time.time()
+        for robots_path in self._robots_cache.glob(f'*{ROBOTS_FILE_SUFFIX}'):
+            host = robots_path.name[: -len(ROBOTS_FILE_SUFFIX)]
+            if host in self._robots_mapping or not HOSTNAME_REGEX.fullmatch(host) or not robots_path.is_file():
+                continue
+            remaining_time = robots_path.stat().st_mtime + ROBOTS_CACHE_TTL - now
+            if remaining_time > 0:
+                self._robots_mapping[host] = robots_path.absolute()
+                self._robots_expiry[host] = time.monotonic() + remaining_time
+        logger.debug('%s robots.txt files loaded from cache folder %s', len(self._robots_mapping), self._robots_cache)
+
+    def _cache_robots_parser(self, host: str, robots_parser: RobotFileParser) -> None:
+        self._robots_parsers[host] = robots_parser
+        self._robots_expiry[host] = time.monotonic() + ROBOTS_CACHE_TTL
+
+    def _cache_denied_host(self, host: str) -> None:
+        self._negative_cache[host] = time.monotonic() + ROBOTS_NEGATIVE_CACHE_TTL
 
     # noinspection PyTypeChecker
     @staticmethod
@@ -16,8 +68,6 @@ class RobotsMixin:
         delay_mapping: Dict[str, Union[int, float]],
         default_delay: Union[int, float],
     ) -> Union[int, float]:
-        pass
-
         crawl_delay = robots_parser.crawl_delay('*')
         if crawl_delay is not None:
             delay_mapping[host] = crawl_delay
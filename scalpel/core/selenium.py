@@ -1,8 +1,10 @@
 import logging
+from typing import List
 
 import attr
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.remote.webdriver import WebDriver
 
@@ -13,16 +15,26 @@ logger = logging.getLogger('scalpel')
 
 @attr.s
 class SeleniumDriverMixin:
-    _driver: WebDriver = attr.ib(init=False, repr=False)
+    _drivers: List[WebDriver] = attr.ib(init=False, repr=False)
+
+    @_drivers.default
+    def _get_drivers(self) -> List[WebDriver]:
+        logger.debug('returning a pool of %s driver(s)', self.config.selenium_pool_size)
+        return [self._get_driver() for _ in range(self.config.selenium_pool_size)]
 
-    @_driver.default
     def _get_driver(self) -> WebDriver:
+        # "eager" strategy means that the driver returns as soon as the DOM is ready without waiting for images,
+        # stylesheets or frames, these resources are useless to parse a page and images are not even loaded
         if self.config.selenium_browser is Browser.FIREFOX:
             logger.debug('returning firefox driver')
             options = FirefoxOptions()
             options.headless = True
+            options.set_preference('permissions.default.image', 2)
+            capabilities = DesiredCapabilities.FIREFOX.copy()
+            capabilities['pageLoadStrategy'] = 'eager'
             driver = webdriver.Firefox(
                 options=options,
+                desired_capabilities=capabilities,
                 executable_path=self.config.selenium_driver_executable_path,
                 service_log_path=self.config.selenium_driver_log_file,
             )
@@ -30,8 +42,12 @@ class SeleniumDriverMixin:
             logger.debug('returning chrome driver')
             options = ChromeOptions()
             options.add_argument('--headless')
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            capabilities = DesiredCapabilities.CHROME.copy()
+            capabilities['pageLoadStrategy'] = 'eager'
             driver = webdriver.Chrome(
                 options=options,
+                desired_capabilities=capabilities,
                 executable_path=self.config.selenium_driver_executable_path,
                 service_log_path=self.config.selenium_driver_log_file,
             )
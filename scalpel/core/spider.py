@@ -1,6 +1,9 @@
 import logging
+import re
 from datetime import datetime
-from typing import Callable, List, Set, Tuple, Union
+from functools import lru_cache
+from typing import Callable, Dict, List, Set, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 import attr
 from rfc3986 import exceptions, iri_reference, validators
@@ -10,6 +13,50 @@ from .config import Configuration
 logger = logging.getLogger('scalpel')
 
 URLS = Union[List[str], Tuple[str], Set[str]]
+# number of urls waiting for the request delay of their host at the same time, when it is reached the spider worker
+# waits before taking new urls from the queue, so that following urls still block on a full queue
+DEFERRED_URLS_LIMIT = 100
+# number of hosts whose next request time is kept before forgetting those already past, the limit grows with the
+# number of hosts still waited for, so that a wide crawl does not scan them for each url
+HOST_NEXT_TIMES_PURGE_SIZE = 1024
+
+# query parameters only used to track visitors, they don't change the content of the page
+TRACKING_PARAMETERS = frozenset(
+    [
+        'utm_source',
+        'utm_medium',
+        'utm_campaign',
+        'utm_term',
+        'utm_content',
+        'utm_id',
+        'fbclid',
+        'gclid',
+        'dclid',
+        'msclkid',
+        'yclid',
+        'mc_cid',
+        'mc_eid',
+        'igshid',
+    ]
+)
+
+
+# ascii http(s) urls with a dns host and file urls with a path are accepted by this regex without parsing them with
+# rfc3986, other urls (internationalized ones, user info, etc...) are checked with the full validation
+_PCHAR = r"(?:[A-Za-z0-9\-._~!$&'()*+,;=:@]|%[0-9A-Fa-f]{2})"
+_LABEL = r'[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?'
+SIMPLE_URL_REGEX = re.compile(
+    rf'(?:https?://{_LABEL}(?:\.{_LABEL})*(?::[0-9]{{1,5}})?(?:/{_PCHAR}*)*|file://(?:/{_PCHAR}*)+)'
+    rf'(?:\?(?:{_PCHAR}|[/?])*)?(?:#(?:{_PCHAR}|[/?])*)?'
+)
+
+ALLOWED_SCHEMES = ['https', 'http', 'file']
+# the validator only holds its rules, so the same instance checks urls of all spiders
+URL_VALIDATOR = (
+    validators.Validator()
+    .allow_schemes(*ALLOWED_SCHEMES)
+    .check_validity_of('scheme', 'host', 'path', 'query', 'fragment')
+)
 
 
 def url_validator(_, attribute: attr.Attribute, urls: URLS):
@@ -23,17 +70,15 @@ def url_validator(_, attribute: attr.Attribute, urls: URLS):
         logger.exception(message)
         raise TypeError(message)
 
-    validator = validators.Validator()
-    allowed_schemes = ['https', 'http', 'file']
-    validator.allow_schemes(*allowed_schemes)
-    validator.check_validity_of('scheme', 'host', 'path', 'query', 'fragment')
-
     for url in urls:
+        if SIMPLE_URL_REGEX.fullmatch(url):
+            continue
+
         uri = iri_reference(url).encode()
         try:
-            validator.validate(uri)
+            URL_VALIDATOR.validate(uri)
         except exceptions.UnpermittedComponentError:
-            message = f'{url} does not have a scheme in {allowed_schemes}'
+            message = f'{url} does not have a scheme in {ALLOWED_SCHEMES}'
             logger.exception(message)
             raise ValueError(message)
         except exceptions.InvalidComponentsError:
@@ -53,6 +98,50 @@ def url_validator(_, attribute: attr.Attribute, urls: URLS):
             raise ValueError(message)
 
 
+def is_file_url(url: str) -> bool:
+    """Tells if an url targets a local file. It is cheaper than parsing the url to get its scheme."""
+    return url[:5].lower() == 'file:'
+
+
+def get_url_host(url: str) -> str:
+    """Returns the lowercase host of an url. It is much cheaper than building an `httpx.URL` object to get it."""
+    return urlsplit(url).hostname or ''
+
+
+# the same urls are canonicalized many times (when handled, followed or already processed), so results are cached
+@lru_cache(maxsize=16384)
+def canonicalize_url(url: str) -> str:
+    """
+    Returns a canonical form of an http url used to detect duplicates. The scheme and host are lowercased (and the host
+    is idna-encoded), the fragment and tracking query parameters are removed, remaining query parameters are sorted and
+    a lone trailing slash is dropped. Remaining query parameters are re-encoded, so `?q=a%20b` becomes `?q=a+b`. Other
+    urls (like file ones) and malformed http urls (invalid host or port) are returned as they are, so that distinct
+    malformed urls are not taken for duplicates.
+    """
+    if is_file_url(url):
+        return url
+
+    try:
+        uri = iri_reference(url).encode()
+    except (exceptions.RFC3986Exception, UnicodeError):
+        # hosts which cannot be idna-encoded, the url will be reported as unreachable when handled
+        return url
+    if uri.scheme is None or uri.scheme.lower() not in ('http', 'https') or uri.host is None:
+        return url
+
+    uri = uri.normalize()
+    query = uri.query
+    if query:
+        parameters = [
+            (key, value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMETERS
+        ]
+        query = urlencode(sorted(parameters)) or None
+    path = None if uri.path == '/' else uri.path
+    return uri.copy_with(path=path, query=query, fragment=None).unsplit()
+
+
 @attr.s
 class State:
     """An empty class used to store arbitrary data."""
@@ -72,6 +161,11 @@ class SpiderStatistics:
     * **robot_excluded_urls:** `set` of urls that were excluded to fetch because of *robots.txt* file rules.
     * **followed_urls:** `set` of urls that were followed during the process of parsing url content. You will find these
     urls scattered in the first three sets.
+
+    Http urls of these sets are stored in their canonical form (see `canonicalize_url`) i.e lowercase scheme and host,
+    no fragment, no tracking query parameters, sorted and re-encoded query and no lone trailing slash. For example
+    `http://Foo.com/?b=2&a=1#top` is stored as `http://foo.com?a=1&b=2`.
+
     * **request_counter:** The number of urls fetched or read (in case of file urls).
     * **average_fetch_time:** The average time to fetch an url (or read a file in case of file urls).
     * **total_time:** The total execution time of the spider.
@@ -103,6 +197,8 @@ class Spider:
     _duration: float = attr.ib(init=False, default=0.0, repr=False)
     _total_fetch_time: float = attr.ib(init=False, default=0.0)
     _state: State = attr.ib(factory=State, init=False, repr=False)
+    _host_next_times: Dict[str, float] = attr.ib(factory=dict, init=False, repr=False)
+    _host_next_times_purge_size: int = attr.ib(default=HOST_NEXT_TIMES_PURGE_SIZE, init=False, repr=False)
 
     @_name.default
     def _get_name(self) -> str:
@@ -111,6 +207,37 @@ class Spider:
         logger.debug('getting a default spider name: %s', name)
         return name
 
+    def _get_robots_prefetch_urls(self) -> List[str]:
+        """Returns the first http url of each host among start urls, they are used to prefetch robots.txt files."""
+        urls = {}
+        for url in self.urls:
+            if not is_file_url(url):
+                urls.setdefault(get_url_host(url), url)
+        return list(urls.values())
+
+    def _get_host_wait_time(self, url: str, delay: Union[int, float], now: float) -> float:
+        """
+        Returns the number of seconds to wait before handling the given url, so that urls of a same host are handled
+        at least `delay` seconds apart without slowing down urls of other hosts.
+        """
+        host = get_url_host(url)
+        start_time = max(now, self._host_next_times.get(host, now))
+        next_time = start_time + delay
+        if next_time > now:
+            self._host_next_times[host] = next_time
+            if len(self._host_next_times) >= self._host_next_times_purge_size:
+                self._purge_host_next_times(now)
+        else:
+            self._host_next_times.pop(host, None)
+        return start_time - now
+
+    def _purge_host_next_times(self, now: float) -> None:
+        # a host whose next time is past does not make its urls wait anymore, so it can be forgotten
+        self._host_next_times = {
+            host: next_time for host, next_time in self._host_next_times.items() if next_time > now
+        }
+        self._host_next_times_purge_size = max(HOST_NEXT_TIMES_PURGE_SIZE, 2 * len(self._host_next_times))
+
     @property
     def name(self) -> str:
         """Returns the name given to the spider."""
@@ -120,7 +247,9 @@ class Spider:
     @property
     def config(self) -> Configuration:
         """Returns the `Configuration` related to the spider."""
-        logger.debug('returning config property: %s', self._config)
+        # this property is read many times for each url
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('returning config property: %s', self._config)
         return self._config
 
     @property
@@ -3,19 +3,20 @@ import time
 from typing import Tuple
 
 from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
 
 logger = logging.getLogger('scalpel')
 
 
 class SeleniumGetMixin:
-    def _get_resource(self, url: str, error_message: str = '') -> Tuple[bool, float]:
+    def _get_resource(self, driver: WebDriver, url: str, error_message: str = '') -> Tuple[bool, float]:
         fetch_time = 0
         unreachable = False
         if not error_message:
             error_message = f'unable to get resource at {url}'
         try:
             before = time.time()
-            self._driver.get(url)
+            driver.get(url)
             fetch_time = time.time() - before
         except WebDriverException:
             logger.exception(error_message)
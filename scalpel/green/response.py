@@ -1,10 +1,12 @@
 import logging
-from typing import Set
+from typing import Optional, Set
 
 import attr
 from gevent.queue import JoinableQueue
 
+from scalpel.core.bloom import BloomFilter
 from scalpel.core.response import BaseSeleniumResponse, BaseStaticResponse
+from scalpel.core.spider import canonicalize_url
 
 logger = logging.getLogger('scalpel')
 
@@ -18,21 +20,32 @@ class FollowMixin:
 
         * **url:** The url to follow.
         """
-        if url in self._followed_urls or url in self._reachable_urls:
+        url = self._get_absolute_url(url)
+        # the canonical form of the absolute url is the one stored in url sets, so relative urls or variants of an url
+        # already followed are detected here and not put in the queue a second time
+        canonical_url = canonicalize_url(url)
+        # same logic as the spider, an url unknown to the bloom filter is not in the url sets either
+        if self._bloom is not None and canonical_url not in self._bloom:
+            self._bloom.add(canonical_url)
+        # reachable urls are start urls or followed ones, so checking followed urls first answers redundant follows with
+        # one lookup, reachable urls are only checked for new urls and start urls
+        elif canonical_url in self._followed_urls or canonical_url in self._reachable_urls:
             logger.debug('url %s has already been processed, nothing to do here', url)
             return
 
-        logger.debug('adding url %s to spider followed_urls attribute and put in the queue to be processed', url)
-        url = self._get_absolute_url(url)
-        self._followed_urls.add(url)
-        self._queue.put_nowait(url)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('adding url %s to spider followed_urls attribute and put in the queue to be processed', url)
+        self._followed_urls.add(canonical_url)
+        self._queue.put(url)
 
 
+# a response is created for each url by the spider which owns these objects, so they are not validated
 @attr.s
 class CommonAttributes:
-    _reachable_urls: Set[str] = attr.ib(validator=attr.validators.instance_of(set))
-    _followed_urls: Set[str] = attr.ib(validator=attr.validators.instance_of(set))
-    _queue: JoinableQueue = attr.ib(validator=attr.validators.instance_of(JoinableQueue))
+    _reachable_urls: Set[str] = attr.ib()
+    _followed_urls: Set[str] = attr.ib()
+    _queue: JoinableQueue = attr.ib()
+    _bloom: Optional[BloomFilter] = attr.ib(default=None, kw_only=True)
 
 
 @attr.s(slots=True)
@@ -48,6 +61,7 @@ class StaticResponse(CommonAttributes, FollowMixin, BaseStaticResponse):
     * **reachable_urls:** A `set` of urls already fetched.
     * **followed_urls:** A `set` of urls already followed by other `StaticResponse` objects.
     * **queue:** The `gevent.queue.JoinableQueue` used by the spider to handle incoming urls.
+    * **bloom:** An optional keyword parameter representing the bloom filter of the spider, checked before url sets.
     * **url:** An optional keyword parameter representing the current url where content was fetched.
     * **text:** An optional keyword parameter representing the content of the resource fetched. Note that if you set
     the `url` parameter, you **must** set this one.
@@ -81,17 +95,23 @@ class SeleniumResponse(CommonAttributes, FollowMixin, BaseSeleniumResponse):
     * **reachable_urls:** A `set` of urls already fetched.
     * **followed_urls:** A `set` of urls already followed by other `StaticResponse` objects.
     * **queue:** The `gevent.queue.JoinableQueue` used by the spider to handle incoming urls.
+    * **bloom:** An optional keyword parameter representing the bloom filter of the spider, checked before url sets.
     * **driver:** The `selenium.WebDriver` object that will be use to control the running browser.
     * **handle:** A string that identifies the current window handled by `selenium`.
+    * **find_timeout:** An optional keyword parameter representing the default number of seconds to wait for an
+    element in `wait_for` method. Defaults to 10s.
 
     Usage:
 
     ```
+    from selenium.webdriver.common.by import By
     from scalpel.green import SeleniumResponse
 
     response = SeleniumResponse(...)
     # We assume we have a page source like '<p>Hello world!</p>'
     print(response.driver.find_element_by_xpath('//p').text)  # Hello world!
+    # if the element is added later by javascript, you can wait for it
+    print(response.wait_for((By.XPATH, '//p')).text)  # Hello world!
     ```
     """
 
@@ -1,12 +1,14 @@
 import logging
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 from urllib.robotparser import RobotFileParser
 
 import attr
 import httpx
 
+from scalpel.core.http import get_ssl_context
 from scalpel.core.robots import RobotsMixin
+from scalpel.core.spider import get_url_host
 
 from .utils.io import open_file
 
@@ -20,14 +22,19 @@ class RobotsAnalyzer(RobotsMixin):
     _robots_cache: Path = attr.ib()
     _robots_mapping: Dict[str, Path] = attr.ib(factory=dict)
     _http_client: httpx.Client = attr.ib()
-    _robots_parser: RobotFileParser = attr.ib(init=False, factory=RobotFileParser)
+    _robots_parsers: Dict[str, RobotFileParser] = attr.ib(init=False, factory=dict)
     _delay_mapping: Dict[str, Union[int, float]] = attr.ib(init=False, factory=dict)
+    _robots_expiry: Dict[str, float] = attr.ib(init=False, factory=dict)
+    _negative_cache: Dict[str, float] = attr.ib(init=False, factory=dict)
+
+    def __attrs_post_init__(self):
+        self._load_robots_cache_folder()
 
     @_http_client.default
     def _get_http_client(self) -> httpx.Client:
         logger.debug('returning default http client with user agent: %s', self._user_agent)
         headers = {'User-Agent': self._user_agent}
-        return httpx.Client(headers=headers)
+        return httpx.Client(headers=headers, verify=get_ssl_context())
 
     @staticmethod
     def _create_robots_file(robots_path: Path, content: str) -> None:
@@ -41,58 +48,98 @@ class RobotsAnalyzer(RobotsMixin):
         with open_file(path) as f:
             return f.readlines()
 
-    def can_fetch(self, url: str) -> bool:
-        httpx_url = httpx.URL(url)
-        host = httpx_url.host
-        robots_url = httpx_url.copy_with(path='/robots.txt')
-
-        if host not in self._robots_mapping:
+    def _get_robots_parser(self, host: str) -> RobotFileParser:
+        # robots.txt files are parsed once per host, the parser is then reused for all the urls of this host
+        if host not in self._robots_parsers:
+            logger.debug('creating robots parser for host %s', host)
+            robots_parser = RobotFileParser()
+            if host in self._robots_mapping:
+                robots_parser.parse(self._get_robots_lines(self._robots_mapping[host]))
+            self._robots_parsers[host] = robots_parser
+        return self._robots_parsers[host]
+
+    def can_fetch(self, url: str, host: Optional[str] = None) -> bool:
+        # callers which already know the url host can give it to avoid parsing the url again
+        if host is None:
+            host = get_url_host(url)
+
+        self._purge_expired_robots_cache(host)
+        if host in self._negative_cache:
+            logger.info('access to robots.txt file of host %s was recently denied, returning False', host)
+            return False
+
+        if host not in self._robots_mapping and host not in self._robots_parsers:
+            # the robots.txt url is only needed when its content is not already cached
+            robots_url = str(httpx.URL(url).join('/robots.txt'))
             try:
-                response = self._http_client.get(f'{robots_url}')
+                response = self._http_client.get(robots_url)
             except httpx.ConnectTimeout:
-                logger.info('cannot connect to host % to get robots.txt file, returning False', robots_url.host)
+                logger.info('cannot connect to host %s to get robots.txt file, returning False', host)
+                self._cache_denied_host(host)
                 return False
             # this is the behaviour of the implementation of CPython RobotFileParser read and can_fetch methods
             # https://github.com/python/cpython/blob/master/Lib/urllib/robotparser.py
             if response.status_code in (401, 403):
                 logger.info(
                     'access to %s is %s, returning False',
-                    f'{robots_url}',
+                    robots_url,
                     httpx.codes.get_reason_phrase(response.status_code),
                 )
+                self._cache_denied_host(host)
                 return False
             elif httpx.codes.is_error(response.status_code):
                 logger.info(
                     'trying to access %s returns a %s error status code, returning True',
-                    f'{robots_url}',
+                    robots_url,
                     response.status_code,
                 )
+                robots_parser = RobotFileParser()
+                robots_parser.allow_all = True
+                self._cache_robots_parser(host, robots_parser)
                 return True
             else:
-                robot_path = self._robots_cache / host
+                robot_path = self._get_robots_path(host)
                 self._create_robots_file(robot_path, response.text)
                 self._robots_mapping[host] = robot_path.absolute()
-
-        self._robots_parser.parse(self._get_robots_lines(self._robots_mapping[host]))
-        is_fetchable = self._robots_parser.can_fetch(self._user_agent, url)
-        logger.info('after analyzing %s file, returning value is %s', f'{robots_url}', is_fetchable)
+                # the content is already in memory, so there is no need to read the file we just created
+                robots_parser = RobotFileParser()
+                robots_parser.parse(response.text.splitlines())
+                self._cache_robots_parser(host, robots_parser)
+
+        robots_parser = self._get_robots_parser(host)
+        is_fetchable = robots_parser.can_fetch(self._user_agent, url)
+        logger.info('after analyzing robots.txt file of host %s, returning value is %s', host, is_fetchable)
         return is_fetchable
 
     def get_request_delay(self, url: str, delay: Union[int, float]) -> Union[int, float]:
-        host = httpx.URL(url).host
+        host = get_url_host(url)
 
-        if host in self._delay_mapping:
-            logger.debug('returning caching value %s', self._delay_mapping[host])
-            return self._delay_mapping[host]
+        # the delay of a host is computed once, later urls of this host only need a dict lookup
+        self._purge_expired_robots_cache(host)
+        request_delay = self._delay_mapping.get(host)
+        if request_delay is not None:
+            logger.debug('returning caching value %s', request_delay)
+            return request_delay
 
         if host not in self._robots_mapping:
-            is_fetchable = self.can_fetch(url)
+            is_fetchable = self.can_fetch(url, host=host)
             if not is_fetchable:
                 self._delay_mapping[host] = -1
                 logger.debug('url %s is not fetchable, returning negative value', url)
                 return -1
 
-        return self._get_request_delay(host, url, self._robots_parser, self._delay_mapping, delay)
+        robots_parser = self._get_robots_parser(host)
+        return self._get_request_delay(host, url, robots_parser, self._delay_mapping, delay)
+
+    def prefetch(self, url: str, delay: Union[int, float]) -> None:
+        """
+        Fetches the robots.txt file of the url host and computes its request delay, so that later calls to `can_fetch`
+        and `get_request_delay` for this host do not wait for the network.
+        """
+        try:
+            self.get_request_delay(url, delay)
+        except httpx.HTTPError:
+            logger.exception('unable to prefetch robots.txt file for url %s', url)
 
     def close(self):
         self._http_client.close()
@@ -1,9 +1,13 @@
 import logging
+from contextlib import contextmanager
+from typing import Iterator
 
 import attr
-from rfc3986 import uri_reference
+from gevent.queue import Queue
+from selenium.webdriver.remote.webdriver import WebDriver
 
 from scalpel.core.selenium import SeleniumDriverMixin
+from scalpel.core.spider import canonicalize_url, is_file_url
 
 from .mixins import SeleniumGetMixin
 from .response import SeleniumResponse
@@ -45,45 +49,72 @@ class SeleniumSpider(SeleniumGetMixin, StaticSpider, SeleniumDriverMixin):
     ```
     """
 
+    # drivers which are not used to handle an url, greenlets wait on this queue when all drivers are busy
+    _free_drivers: Queue = attr.ib(init=False, repr=False)
+
+    @_free_drivers.default
+    def _get_free_drivers(self) -> Queue:
+        return Queue(items=self._drivers)
+
     def __attrs_post_init__(self):
         # this erases the content of StaticSpider.__attrs_post_init__ which is not useful here
         pass
 
-    def _get_selenium_response(self, handle: str) -> SeleniumResponse:
+    @contextmanager
+    def _lease_driver(self) -> Iterator[WebDriver]:
+        driver = self._free_drivers.get()
+        try:
+            yield driver
+        finally:
+            self._free_drivers.put(driver)
+
+    def _get_selenium_response(self, driver: WebDriver, handle: str) -> SeleniumResponse:
         return SeleniumResponse(
-            self.reachable_urls, self.followed_urls, self._queue, driver=self._driver, handle=handle
+            self.reachable_urls,
+            self.followed_urls,
+            self._queue,
+            bloom=self._bloom,
+            driver=driver,
+            handle=handle,
+            find_timeout=self.config.selenium_find_timeout,
         )
 
     def _cleanup(self) -> None:
+        with self._lock:
+            self._flush_items()
         self._http_client.close()
-        self._driver.quit()
+        for driver in self._drivers:
+            driver.quit()
 
     # noinspection PyBroadException
     def _handle_url(self, url: str) -> None:
-        if self._is_url_already_processed(url):
+        canonical_url = canonicalize_url(url)
+        if self._is_url_already_processed(canonical_url):
             return
 
-        ur = uri_reference(url)
         error_message = ''
-        if ur.scheme == 'file':
+        if is_file_url(url):
             error_message = f'unable to open file {url}'
         else:
-            if self._is_url_excluded_for_spider(url):
+            if self._is_url_excluded(url):
+                self.robots_excluded_urls.add(canonical_url)
                 return
-        unreachable, fetch_time = self._get_resource(url, error_message)
-        if unreachable:
-            self.unreachable_urls.add(url)
-            return
-        # we update some stats
-        self.request_counter += 1
-        self._total_fetch_time += fetch_time
-        self.reachable_urls.add(url)
-
-        handle = self._driver.current_window_handle
-        try:
-            self.parse(self, self._get_selenium_response(handle))
-        except Exception:
-            logger.exception('something unexpected happened while parsing the content at url %s', url)
-            if not self._ignore_errors:
-                raise
+        # the driver is kept until the page is parsed since the response relies on it
+        with self._lease_driver() as driver:
+            unreachable, fetch_time = self._get_resource(driver, url, error_message)
+            if unreachable:
+                self.unreachable_urls.add(canonical_url)
+                return
+            # we update some stats
+            self.request_counter += 1
+            self._total_fetch_time += fetch_time
+            self.reachable_urls.add(canonical_url)
+
+            handle = driver.current_window_handle
+            try:
+                self.parse(self, self._get_selenium_response(driver, handle))
+            except Exception:
+                logger.exception('something unexpected happened while parsing the content at url %s', url)
+                if not self._ignore_errors:
+                    raise
         logger.info('content at url %s has been processed', url)
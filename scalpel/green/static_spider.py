@@ -1,25 +1,32 @@
 import logging
 import platform
-from time import time
-from typing import Any, Callable, Optional
+from time import monotonic, time
+from typing import Any, Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
 
 import attr
 import gevent
 import httpx
-from gevent.lock import RLock
+import msgpack
+from gevent import get_hub
+from gevent.lock import BoundedSemaphore, RLock
 from gevent.pool import Pool
-from gevent.queue import JoinableQueue
-from rfc3986 import uri_reference
 
-from scalpel.core.spider import Spider
+from scalpel.core.bloom import BloomFilter
+from scalpel.core.http import get_ssl_context
+from scalpel.core.io import read_text_file
+from scalpel.core.spider import DEFERRED_URLS_LIMIT, Spider, canonicalize_url, is_file_url
 
-from .files import write_mp
 from .response import StaticResponse
 from .robots import RobotsAnalyzer
 from .utils.io import open_file
+from .utils.queue import AlternatingJoinableQueue
 
 logger = logging.getLogger('scalpel')
 
+# the platform does not change while the program runs, so there is no need to check it for each file url
+_IS_WINDOWS = platform.system() == 'Windows'
+
 
 @attr.s(slots=True)
 class StaticSpider(Spider):
@@ -55,10 +62,17 @@ class StaticSpider(Spider):
     _start_time: float = attr.ib(init=False, factory=time, repr=False)
     _http_client: httpx.Client = attr.ib(init=False, repr=False)
     _robots_analyser: RobotsAnalyzer = attr.ib(init=False, repr=False)
+    _is_url_excluded: Callable[[str], bool] = attr.ib(init=False, repr=False)
     _fetch: Callable = attr.ib(init=False, repr=False)
     _lock: RLock = attr.ib(factory=RLock, init=False, repr=False)
-    _pool: Pool = attr.ib(factory=Pool, init=False, repr=False)
-    _queue: JoinableQueue = attr.ib(init=False, repr=False)
+    _pool: Pool = attr.ib(init=False, repr=False)
+    _queue: AlternatingJoinableQueue = attr.ib(init=False, repr=False)
+    _bloom: Optional[BloomFilter] = attr.ib(init=False, repr=False)
+    _items_buffer: List[Any] = attr.ib(factory=list, init=False, repr=False)
+    _last_flush: float = attr.ib(factory=monotonic, init=False, repr=False)
+    _deferred_urls: BoundedSemaphore = attr.ib(
+        factory=lambda: BoundedSemaphore(DEFERRED_URLS_LIMIT), init=False, repr=False
+    )
 
     def __attrs_post_init__(self):
         def _get_fetch(url: str) -> httpx.Response:
@@ -72,10 +86,27 @@ class StaticSpider(Spider):
     def _get_http_client(self) -> httpx.Client:
         headers = {'User-Agent': self.config.user_agent}
         logger.debug('getting a default httpx client with user agent: %s', self.config.user_agent)
-        return httpx.Client(headers=headers, timeout=self.config.fetch_timeout)
+        return httpx.Client(
+            headers=headers,
+            timeout=self.config.fetch_timeout,
+            limits=self._get_http_limits(),
+            http2=self.config.http2,
+            verify=get_ssl_context(self.config.http2),
+        )
+
+    def _get_http_limits(self) -> httpx.Limits:
+        if self.config.pool_size is None:
+            # same maximum as the httpx default one, but more idle connections are kept since the number of greenlets
+            # handling urls is not bounded
+            return httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        # each greenlet of the pool must be able to get a connection without waiting for another one to be released,
+        # extra connections are kept for robots.txt files fetched while urls are being handled
+        logger.debug('getting httpx limits sized for a pool of %s greenlets', self.config.pool_size)
+        return httpx.Limits(max_connections=self.config.pool_size * 2, max_keepalive_connections=self.config.pool_size)
 
     @_robots_analyser.default
     def _get_robots_analyzer(self) -> RobotsAnalyzer:
+        # the analyzer shares the spider client, so robots.txt files and pages of a host use the same connections
         logger.debug('getting a default robots analyzer')
         return RobotsAnalyzer(
             http_client=self._http_client,
@@ -83,72 +114,108 @@ class StaticSpider(Spider):
             user_agent=self.config.user_agent,
         )
 
+    @_is_url_excluded.default
+    def _get_url_exclusion_check(self) -> Callable[[str], bool]:
+        # follow_robots_txt does not change during a run, so it is checked once here instead of for each url
+        if self.config.follow_robots_txt:
+            return self._is_url_excluded_for_spider
+        return lambda _: False
+
+    @_pool.default
+    def _get_pool(self) -> Pool:
+        logger.debug('getting a pool handling at most %s urls concurrently', self.config.pool_size)
+        return Pool(self.config.pool_size)
+
     @_queue.default
-    def _get_joinable_queue(self) -> JoinableQueue:
+    def _get_joinable_queue(self) -> AlternatingJoinableQueue:
         logger.debug('getting a default joinable queue')
-        return JoinableQueue(items=self.urls)
+        maxsize = self.config.queue_maxsize
+        # start urls must all fit in the queue, otherwise the spider will block before running
+        if maxsize is not None:
+            maxsize = max(maxsize, len(self.urls))
+        return AlternatingJoinableQueue(maxsize, items=self.urls)
+
+    @_bloom.default
+    def _get_bloom(self) -> Optional[BloomFilter]:
+        if self.config.bloom_capacity is None:
+            return
+        logger.debug('getting a bloom filter with a capacity of %s urls', self.config.bloom_capacity)
+        return BloomFilter(self.config.bloom_capacity, self.config.bloom_error_rate)
 
     def _get_static_response(
         self, url: str = '', text: str = '', httpx_response: httpx.Response = None
     ) -> StaticResponse:
+        # only the text length is logged, a page body in the log arguments is useless and costly if formatted
         logger.debug(
-            'returning StaticResponse object with url: %s, text: %s and httpx_response: %s', url, text, httpx_response
+            'returning StaticResponse object with url: %s, text of length %s and httpx_response: %s',
+            url,
+            len(text),
+            httpx_response,
         )
         return StaticResponse(
-            self.reachable_urls, self.followed_urls, self._queue, url=url, text=text, httpx_response=httpx_response
+            self.reachable_urls,
+            self.followed_urls,
+            self._queue,
+            bloom=self._bloom,
+            url=url,
+            text=text,
+            httpx_response=httpx_response,
         )
 
     def _is_url_already_processed(self, url: str) -> bool:
         processed = False
-        if url in [*self.reachable_urls, *self.unreachable_urls, *self.robots_excluded_urls]:
+        # a bloom filter never gives false negatives, so an url it does not know is not in the url sets either
+        if self._bloom is not None and url not in self._bloom:
+            self._bloom.add(url)
+        elif url in self.reachable_urls or url in self.unreachable_urls or url in self.robots_excluded_urls:
             logger.debug('url %s has already been processed', url)
             processed = True
         return processed
 
     def _is_url_excluded_for_spider(self, url: str) -> bool:
         excluded = False
-        if self.config.follow_robots_txt:
-            if not self._robots_analyser.can_fetch(url):
-                logger.info('robots.txt rule has forbidden the processing of url %s or the url is not reachable', url)
-                self.robots_excluded_urls.add(url)
-                excluded = True
+        if not self._robots_analyser.can_fetch(url):
+            logger.info('robots.txt rule has forbidden the processing of url %s or the url is not reachable', url)
+            excluded = True
         return excluded
 
     # noinspection PyBroadException
     def _handle_url(self, url: str) -> None:
-        if self._is_url_already_processed(url):
+        # the canonical form is the one stored in url sets, so that duplicates are detected
+        canonical_url = canonicalize_url(url)
+        if self._is_url_already_processed(canonical_url):
             return
 
         static_url = text = ''
         response: Optional[httpx.Response] = None
-        ur = uri_reference(url)
-        if ur.scheme == 'file':
+        if is_file_url(url):
             static_url = url
-            logger.debug('url %s is a file url so we attempt to read its content')
-            file_path = ur.path[1:] if platform.system() == 'Windows' else ur.path
+            logger.debug('url %s is a file url so we attempt to read its content', url)
+            path = urlsplit(url).path
+            file_path = path[1:] if _IS_WINDOWS else path
             try:
                 before = time()
-                with open_file(file_path) as f:
-                    text = f.read()
+                text = get_hub().threadpool.spawn(read_text_file, file_path).get()
                 fetch_time = time() - before
             except OSError:
                 logger.exception('unable to open file %s', url)
-                self.unreachable_urls.add(url)
+                self.unreachable_urls.add(canonical_url)
                 return
         else:
-            if self._is_url_excluded_for_spider(url):
+            if self._is_url_excluded(url):
+                self.robots_excluded_urls.add(canonical_url)
                 return
 
             response: httpx.Response = self._fetch(url)
             if response.is_error:
                 logger.info('fetching url %s returns an error with status code %s', url, response.status_code)
-                self.unreachable_urls.add(url)
+                self.unreachable_urls.add(canonical_url)
                 return
             fetch_time = response.elapsed.total_seconds()
 
         # we update some variables for statistics
         self.request_counter += 1
-        self.reachable_urls.add(url)
+        self.reachable_urls.add(canonical_url)
         self._total_fetch_time += fetch_time
 
         try:
@@ -159,22 +226,62 @@ class StaticSpider(Spider):
                 raise
         logger.info('content at url %s has been processed', url)
 
-    def save_item(self, item: Any) -> None:
-        """Saves a scrapped item in the backup filename specified in `Configuration.backup_filename` attribute."""
-        item_rejected = False
+    def _process_item(self, item: Any) -> Any:
+        """Passes an item through item processors and returns the result or `None` if one of them rejected it."""
         original_item = item
         for processor in self.config.item_processors:
             item = processor(item)
             if item is None:
-                item_rejected = True
-                break
-        if item_rejected:
-            logger.debug('item %s was rejected', original_item)
+                logger.debug('item %s was rejected', original_item)
+                return
+        return item
+
+    def save_item(self, item: Any) -> None:
+        """Saves a scrapped item in the backup filename specified in `Configuration.backup_filename` attribute."""
+        item = self._process_item(item)
+        if item is None:
             return
 
-        logger.debug('writing item %s to file %s', item, self.config.backup_filename)
+        logger.debug('buffering item %s before writing it to file %s', item, self.config.backup_filename)
+        with self._lock:
+            self._items_buffer.append(item)
+            if self._is_flush_due():
+                self._flush_items()
+
+    def save_items(self, items: Iterable[Any]) -> None:
+        """
+        Saves many scrapped items in the backup filename specified in `Configuration.backup_filename` attribute. The
+        lock protecting the items buffer is only taken once for all the items.
+
+        **Parameters:**
+
+        * **items:** The items to save.
+        """
+        items = [item for item in map(self._process_item, items) if item is not None]
+        logger.debug('buffering %s items before writing them to file %s', len(items), self.config.backup_filename)
         with self._lock:
-            write_mp(self.config.backup_filename, item, mode='a', encoder=self.config.msgpack_encoder)
+            self._items_buffer.extend(items)
+            if self._is_flush_due():
+                self._flush_items()
+
+    def _is_flush_due(self) -> bool:
+        if len(self._items_buffer) >= self.config.backup_batch_size:
+            return True
+        flush_interval = self.config.backup_flush_interval
+        return flush_interval is not None and monotonic() - self._last_flush >= flush_interval
+
+    def _flush_items(self) -> None:
+        """Writes buffered items in the backup file in one go."""
+        if not self._items_buffer:
+            return
+        # msgpack objects can be concatenated in a stream, so all the items are packed and written once
+        packer = msgpack.Packer(default=self.config.msgpack_encoder)
+        data = b''.join(packer.pack(item) for item in self._items_buffer)
+        logger.debug('writing %s items to file %s', len(self._items_buffer), self.config.backup_filename)
+        with open_file(self.config.backup_filename, 'ab') as f:
+            f.write(data)
+        self._items_buffer.clear()
+        self._last_flush = monotonic()
 
     @staticmethod
     def _error_callback(task: gevent.Greenlet) -> None:
@@ -188,27 +295,56 @@ class StaticSpider(Spider):
         logger.debug('running greenlet done callback')
         self._queue.task_done()
 
+    def _spawn_url_task(self, url: str) -> None:
+        task = self._pool.spawn(self._handle_url, url)
+        task.link_exception(self._error_callback)
+        task.link(self._done_callback)
+
+    def _spawn_deferred_url_task(self, url: str) -> None:
+        # the url is no longer waiting, so the worker can defer another one
+        self._deferred_urls.release()
+        self._spawn_url_task(url)
+
     def _worker(self) -> None:
         # TODO: I had a weird LoopExit issue (while testing) when I tried to get the delay between requests
         #  and skipped some urls in the while loop, so to avoid it, I don't relay on robots.txt delay but on the one
         #  provided by config object.
         while True:
-            task = self._pool.spawn(self._handle_url, self._queue.get())
-            task.link_exception(self._error_callback)
-            task.link(self._done_callback)
-            gevent.sleep(self.config.request_delay)
+            url = self._queue.get()
+            # the worker does not sleep itself, otherwise the delay of one host would hold back urls of all hosts
+            now = monotonic()
+            wait_time = self._get_host_wait_time(url, self.config.request_delay, now)
+            if wait_time:
+                # deferred urls are bounded, otherwise the worker would empty the queue in timers waiting for a slow
+                # host
+                self._deferred_urls.acquire()
+                # the time spent waiting for a free slot is deducted from the delay of the url
+                gevent.spawn_later(max(now + wait_time - monotonic(), 0), self._spawn_deferred_url_task, url)
+            else:
+                self._spawn_url_task(url)
 
     def _cleanup(self) -> None:
         """This method helps to cleanup resources. It should be override by SeleniumSpider."""
+        with self._lock:
+            self._flush_items()
         self._http_client.close()
 
+    def _prefetch_robots(self) -> None:
+        urls = self._get_robots_prefetch_urls()
+        logger.debug('prefetching robots.txt files of %s hosts', len(urls))
+        # robots.txt files of the different hosts are fetched concurrently instead of one after the other
+        self._pool.map(lambda url: self._robots_analyser.prefetch(url, self.config.request_delay), urls)
+
     def run(self) -> None:
         """Runs the spider."""
-        worker_task = self._pool.spawn(self._worker)
+        if self.config.follow_robots_txt:
+            self._prefetch_robots()
+        # the worker is not spawned in the pool, so it never takes a slot reserved to url handling
+        worker_task = gevent.spawn(self._worker)
         worker_task.name = 'worker'
         worker_task.link_exception(self._error_callback)
         self._queue.join()
-        # at this point all urls were handled, so the only remaining task in the pool is the worker
-        self._pool.killone(worker_task)
+        # at this point all urls were handled, so the only remaining task is the worker
+        worker_task.kill()
         self._cleanup()
         self._duration = time() - self._start_time
@@ -1,5 +1,5 @@
 """Utilities to read / write files and manage different IO buffers"""
-from io import BufferedReader, open
+from io import BufferedReader, BytesIO, StringIO, open
 from typing import IO, Any, AnyStr, Callable, Iterator, List, Optional, TypeVar, Union
 
 import attr
@@ -13,57 +13,70 @@ File = TypeVar('File')
 class AsyncFile:
     """
     A wrapper around builtins io objects like `io.StringIO` or `io.BufferedReader` running blocking operations like
-    `read` or `write` in a threadpool to make it gevent cooperative.
+    `read` or `write` in a threadpool to make it gevent cooperative. In-memory objects like `io.StringIO` never block,
+    so their methods are called directly.
     """
 
     _wrapper: Union[IO, BufferedReader] = attr.ib()
     _pool: ThreadPool = attr.ib(init=False)
+    _in_memory: bool = attr.ib(init=False)
 
     @_pool.default
     def _get_pool(self) -> ThreadPool:
         return get_hub().threadpool
 
+    @_in_memory.default
+    def _is_in_memory(self) -> bool:
+        return isinstance(self._wrapper, (BytesIO, StringIO))
+
+    def _run(self, method: Callable, *args: Any) -> Any:
+        # dispatching to the threadpool costs more than the operation itself when there is no disk access
+        if self._in_memory:
+            return method(*args)
+        return self._pool.spawn(method, *args).get()
+
     def read(self, size: int = -1) -> AnyStr:
-        return self._pool.spawn(self._wrapper.read, size).get()
+        return self._run(self._wrapper.read, size)
 
     def read1(self, size: int = -1) -> AnyStr:
-        return self._pool.spawn(self._wrapper.read1, size).get()
+        return self._run(self._wrapper.read1, size)
 
     def readline(self, size: int = -1) -> AnyStr:
-        return self._pool.spawn(self._wrapper.readline, size).get()
+        return self._run(self._wrapper.readline, size)
 
     def readlines(self, hint: int = -1) -> List[AnyStr]:
-        return self._pool.spawn(self._wrapper.readlines, hint).get()
+        return self._run(self._wrapper.readlines, hint)
 
     def readinto(self, b: Union[bytes, bytearray, memoryview]) -> int:
-        return self._pool.spawn(self._wrapper.readinto, b).get()
+        return self._run(self._wrapper.readinto, b)
 
     def readinto1(self, b: Union[bytes, bytearray, memoryview]) -> int:
-        return self._pool.spawn(self._wrapper.readinto1, b).get()
+        return self._run(self._wrapper.readinto1, b)
 
     def seek(self, offset: int, whence: int = 0) -> int:
-        return self._pool.spawn(self._wrapper.seek, offset, whence).get()
+        return self._run(self._wrapper.seek, offset, whence)
 
     def tell(self) -> int:
-        return self._pool.spawn(self._wrapper.tell).get()
+        # on a file, it may flush pending writes or read data to rebuild the decoder state of a text file
+        return self._run(self._wrapper.tell)
 
     def write(self, s: AnyStr) -> int:
-        return self._pool.spawn(self._wrapper.write, s).get()
+        return self._run(self._wrapper.write, s)
 
     def writelines(self, lines: List[AnyStr]) -> None:
-        return self._pool.spawn(self._wrapper.writelines, lines).get()
+        return self._run(self._wrapper.writelines, lines)
 
     def truncate(self, size: Optional[int] = None) -> int:
-        return self._pool.spawn(self._wrapper.truncate, size).get()
+        return self._run(self._wrapper.truncate, size)
 
     def peek(self, size: Optional[int] = None) -> bytes:
-        return self._pool.spawn(self._wrapper.peek, size).get()
+        return self._run(self._wrapper.peek, size)
 
     def flush(self) -> None:
-        return self._pool.spawn(self._wrapper.flush).get()
+        return self._run(self._wrapper.flush)
 
     def close(self) -> None:
-        return self._pool.spawn(self._wrapper.close).get()
+        return self._run(self._wrapper.close)
 
     def __enter__(self) -> 'AsyncFile':
         return self
@@ -0,0 +1,20 @@
+"""A gevent joinable queue serving items from both of its ends"""
+from typing import Any, Iterable, Optional
+
+from gevent.queue import JoinableQueue
+
+
+class AlternatingJoinableQueue(JoinableQueue):
+    """
+    A `gevent.queue.JoinableQueue` whose `get` method alternately returns the oldest and the newest item. When a
+    parse function follows a burst of urls, urls put before the burst are still served every two calls instead of
+    waiting for the whole burst to be handled.
+    """
+
+    def _init(self, maxsize: Optional[int], items: Iterable[Any] = ()) -> None:
+        super()._init(maxsize, items)
+        self._from_left = False
+
+    def _get(self) -> Any:
+        self._from_left = not self._from_left
+        return self.queue.popleft() if self._from_left else self.queue.pop()
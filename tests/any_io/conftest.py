@@ -6,3 +6,9 @@ import respx
 async def httpx_mock():
     async with respx.mock(base_url='http://example.com') as _http_mock:
         yield _http_mock
+
+
+@pytest.fixture()
+def robots_route(httpx_mock, request):
+    """robots.txt route of example.com, the response given to respx comes from the indirect parametrization"""
+    return httpx_mock.get('/robots.txt') % request.param
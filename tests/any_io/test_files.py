@@ -1,8 +1,10 @@
 from datetime import datetime
+from pathlib import Path
 
+import anyio
 import pytest
 
-from scalpel.any_io.files import read_mp, write_mp
+from scalpel.any_io.files import AsyncMsgpackWriter, read_mp, write_mp
 
 pytestmark = pytest.mark.anyio
 
@@ -19,25 +21,31 @@ class TestReadMp:
 
         assert f'{decoder} is not callable' == str(exc_info.value)
 
+    @pytest.mark.parametrize('path_type', [str, Path])
     async def test_should_return_python_objects_when_reading_file_without_custom_decoder(
-        self, tmp_path, create_msgpack_file
+        self, msgpack_data_file, path_type
     ):
-        given_data = [[1, 2], 'hello', {'fruit': 'apple'}]
-        mp_file = tmp_path / 'data.mp'
-        create_msgpack_file(mp_file, given_data)
+        mp_file, given_data = msgpack_data_file
 
-        for file in [f'{mp_file}', mp_file]:
-            assert [item async for item in read_mp(file)] == given_data
+        assert [item async for item in read_mp(path_type(mp_file))] == given_data
 
+    @pytest.mark.parametrize('path_type', [str, Path])
     async def test_should_return_python_objects_when_reading_file_with_custom_decoder(
-        self, tmp_path, decode_datetime, create_msgpack_file
+        self, tmp_path, decode_datetime, create_msgpack_file, path_type
     ):
         given_data = ['hello', datetime.now()]
         mp_file = tmp_path / 'data.mp'
         create_msgpack_file(mp_file, given_data)
 
-        for file in [str(mp_file), mp_file]:
-            assert [item async for item in read_mp(file, decoder=decode_datetime)] == given_data
+        assert [item async for item in read_mp(path_type(mp_file), decoder=decode_datetime)] == given_data
+
+    async def test_should_read_items_spread_over_several_chunks(self, tmp_path, mocker, create_msgpack_file):
+        mocker.patch('scalpel.any_io.files.READ_CHUNK_SIZE', 10)
+        given_data = ['foo' * 10, {'fruit': 'water melon'}, list(range(20)), 4]
+        mp_file = tmp_path / 'data.mp'
+        create_msgpack_file(mp_file, given_data)
+
+        assert [item async for item in read_mp(mp_file)] == given_data
 
 
 class TestWriteMp:
@@ -97,3 +105,47 @@ class TestWriteMp:
             assert length > 0
 
         assert content == [item async for item in read_mp(mp_file, decoder=decode_datetime)]
+
+
+class TestAsyncMsgpackWriter:
+    """Tests class AsyncMsgpackWriter"""
+
+    # noinspection PyTypeChecker
+    @pytest.mark.parametrize('mode', ['r', 'rb'])
+    def test_should_raise_error_when_mode_is_not_correct(self, mode):
+        with pytest.raises(TypeError) as exc_info:
+            AsyncMsgpackWriter('foo', mode)
+
+        assert f'The only modes expected are "a" and "w" but you provided {mode}' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    @pytest.mark.parametrize('encoder', ['foo', 4])
+    def test_should_raise_error_when_encoder_is_not_callable(self, encoder):
+        with pytest.raises(TypeError) as exc_info:
+            AsyncMsgpackWriter('foo', encoder=encoder)
+
+        assert f'{encoder} is not callable' == str(exc_info.value)
+
+    async def test_should_write_items_with_the_same_opened_file(
+        self, tmp_path, mocker, encode_datetime, decode_datetime
+    ):
+        open_file_mock = mocker.patch('anyio.open_file', wraps=anyio.open_file)
+        content = ['foo', datetime.now(), {'fruit': 'apple'}, [1, 4]]
+        mp_file = tmp_path / 'data.mp'
+
+        async with AsyncMsgpackWriter(mp_file, 'w', encode_datetime) as writer:
+            assert await writer.write(content[0]) > 0
+            assert await writer.writemany(content[1:]) > 0
+
+        open_file_mock.assert_called_once_with(mp_file, 'wb')
+        assert content == [item async for item in read_mp(mp_file, decoder=decode_datetime)]
+
+    async def test_should_append_items_to_an_existing_file(self, tmp_path):
+        mp_file = tmp_path / 'data.mp'
+        await write_mp(mp_file, 'foo', mode='w')
+
+        writer = AsyncMsgpackWriter(mp_file)
+        await writer.writemany(['bar', 2])
+        await writer.close()
+
+        assert ['foo', 'bar', 2] == [item async for item in read_mp(mp_file)]
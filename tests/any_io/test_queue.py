@@ -1,3 +1,4 @@
+import logging
 import math
 
 import anyio
@@ -58,7 +59,7 @@ class TestQueueInitialization:
 
 
 class TestPutMethods:
-    """Tests methods put and put_nowait"""
+    """Tests methods put, put_nowait and put_many"""
 
     async def test_should_work_when_adding_item_with_put_method(self):
         queue = Queue(size=3)
@@ -98,9 +99,57 @@ class TestPutMethods:
 
         assert not queue._finished.is_set()
 
+    async def test_should_keep_event_when_tasks_are_already_in_progress(self):
+        queue = Queue(3, items=[1])
+        event = queue._finished
+        queue.put_nowait(2)
+        await queue.put(3)
+
+        assert queue._finished is event
+        assert 3 == queue._tasks_in_progress
+
+    async def test_should_only_call_debug_logger_when_debug_level_is_enabled(self, mocker, caplog):
+        queue = Queue(size=2)
+        logger_mock = mocker.patch('logging.Logger.debug')
+        await queue.put(1)
+
+        logger_mock.assert_not_called()
+
+        caplog.set_level(logging.DEBUG, logger='scalpel')
+        await queue.put(2)
+
+        logger_mock.assert_any_call('adding item %s to queue', 2)
+
+    async def test_should_add_all_items_when_using_put_many_method(self, mocker):
+        checkpoint_spy = mocker.spy(anyio.lowlevel, 'checkpoint')
+        queue = Queue(size=3)
+        queue._finished.set()
+        await queue.put_many([1, 2, 3])
+
+        assert 1 == checkpoint_spy.call_count
+        assert 3 == queue.length
+        assert 3 == queue._tasks_in_progress
+        assert not queue._finished.is_set()
+        assert [1, 2, 3] == [queue.get_nowait() for _ in range(3)]
+
+    async def test_should_wait_for_free_slots_when_items_do_not_fit_in_put_many_method(self):
+        queue = Queue(size=1)
+        got_items = []
+
+        async def consume():
+            for _ in range(3):
+                got_items.append(await queue.get())
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consume)
+            await queue.put_many([1, 2, 3])
+
+        assert [1, 2, 3] == got_items
+        assert 3 == queue._tasks_in_progress
+
 
 class TestGetMethods:
-    """Tests methods get and get_nowait"""
+    """Tests methods get, get_nowait and get_many"""
 
     async def test_should_work_when_using_get_method(self):
         queue = Queue(3, items=[2, 'foo'])
@@ -120,6 +169,27 @@ class TestGetMethods:
         with pytest.raises(anyio.WouldBlock):
             queue.get_nowait()
 
+    @pytest.mark.parametrize(('max_items', 'expected_items'), [(2, [1, 2]), (5, [1, 2, 3])])
+    async def test_should_return_at_most_max_items_when_using_get_many_method(self, max_items, expected_items):
+        queue = Queue(3, items=[1, 2, 3])
+
+        assert expected_items == await queue.get_many(max_items)
+
+    async def test_should_wait_for_one_item_when_using_get_many_method_on_empty_queue(self):
+        queue = Queue(3)
+        got_items = []
+
+        async def consume():
+            got_items.extend(await queue.get_many(3))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consume)
+            await anyio.sleep(0.01)
+            assert [] == got_items
+            queue.put_nowait('foo')
+
+        assert ['foo'] == got_items
+
 
 class TestCloseMethod:
     """Tests method close"""
@@ -161,13 +231,15 @@ class TestTaskDoneAndJoinMethods:
             await queue.get()
             assert 1 == queue._tasks_in_progress
 
-            with anyio.move_on_after(1) as cancel_scope:
+            # join blocks at its first checkpoint, so an already expired deadline is enough to know it does not return
+            with anyio.move_on_after(0) as cancel_scope:
                 await queue.join()
 
             assert cancel_scope.cancel_called
             queue.task_done()
             assert 0 == queue._tasks_in_progress
 
+            # join still checkpoints when the event is set, so the deadline cannot be 0 here, but it is not reached
             with anyio.move_on_after(1) as cancel_scope:
                 await queue.join()
 
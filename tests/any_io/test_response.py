@@ -1,26 +1,33 @@
-import httpx
+import anyio
 import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
 
 from scalpel.any_io.queue import Queue
 from scalpel.any_io.response import SeleniumResponse, StaticResponse
+from scalpel.core.bloom import BloomFilter
 
 pytestmark = pytest.mark.anyio
 
+# responses only read reachable urls, so immutable sets are shared by the tests instead of being built by each of them
+FOO_URLS = frozenset({'http://foo.com'})
+BAR_URLS = frozenset({'http://bar.com'})
+
 
 class TestStaticResponse:
     """Tests StaticResponse.follow method"""
 
     @pytest.mark.parametrize(
-        ('reachable_urls', 'followed_urls'), [({'http://foo.com'}, set()), (set(), {'http://foo.com'})]
+        ('reachable_urls', 'followed_urls'), [(FOO_URLS, set()), (frozenset(), {'http://foo.com'})]
     )
-    async def test_should_not_follow_already_processed_url(self, mocker, reachable_urls, followed_urls):
+    async def test_should_not_follow_already_processed_url(
+        self, foo_httpx_response, mocker, reachable_urls, followed_urls
+    ):
         logger_mock = mocker.patch('logging.Logger.debug')
         url = 'http://foo.com'
-        request = httpx.Request('GET', url)
-        httpx_response = httpx.Response(200, request=request)
         queue = Queue()
         response = StaticResponse(
-            reachable_urls=reachable_urls, followed_urls=followed_urls, queue=queue, httpx_response=httpx_response
+            reachable_urls=reachable_urls, followed_urls=followed_urls, queue=queue, httpx_response=foo_httpx_response
         )
 
         await response.follow(url)
@@ -28,19 +35,65 @@ class TestStaticResponse:
 
         assert mocker.call('url %s has already been processed, nothing to do here', url) in logger_mock.call_args_list
 
-    async def test_should_follow_unprocessed_url(self):
+    async def test_should_follow_unprocessed_url(self, foo_httpx_response):
+        url = 'http://foo.com'
+        queue = Queue(2)
+        response = StaticResponse(
+            reachable_urls=BAR_URLS, followed_urls=set(), queue=queue, httpx_response=foo_httpx_response
+        )
+        await response.follow(url)
+        queue_length = queue.length
+        await queue.close()
+
+        assert BAR_URLS == response._reachable_urls
+        assert {url} == response._followed_urls
+        assert 1 == queue_length
+
+    async def test_should_not_check_reachable_urls_when_url_was_already_followed(self, foo_httpx_response, mocker):
+        reachable_urls = mocker.MagicMock()
+        queue = Queue()
+        response = StaticResponse(
+            reachable_urls=reachable_urls,
+            followed_urls={'http://foo.com/page'},
+            queue=queue,
+            httpx_response=foo_httpx_response,
+        )
+        await response.follow('/page')
+        queue_length = queue.length
+        await queue.close()
+
+        reachable_urls.__contains__.assert_not_called()
+        assert 0 == queue_length
+
+    async def test_should_not_follow_relative_url_twice(self, foo_httpx_response):
+        queue = Queue(3)
+        response = StaticResponse(
+            reachable_urls=set(), followed_urls=set(), queue=queue, httpx_response=foo_httpx_response
+        )
+        await response.follow('/page')
+        await response.follow('/page#title')
+        await response.follow('http://FOO.com/page')
+        queue_length = queue.length
+        url = await queue.get()
+        await queue.close()
+
+        assert {'http://foo.com/page'} == response._followed_urls
+        assert 1 == queue_length
+        assert 'http://foo.com/page' == url
+
+    async def test_should_check_bloom_filter_before_url_sets(self, foo_httpx_response):
         url = 'http://foo.com'
-        request = httpx.Request('GET', url)
-        httpx_response = httpx.Response(200, request=request)
+        bloom = BloomFilter(100)
         queue = Queue(2)
         response = StaticResponse(
-            reachable_urls={'http://bar.com'}, followed_urls=set(), queue=queue, httpx_response=httpx_response
+            reachable_urls=set(), followed_urls=set(), queue=queue, bloom=bloom, httpx_response=foo_httpx_response
         )
         await response.follow(url)
+        await response.follow(url)
         queue_length = queue.length
         await queue.close()
 
-        assert {'http://bar.com'} == response._reachable_urls
+        assert url in bloom
         assert {url} == response._followed_urls
         assert 1 == queue_length
 
@@ -49,7 +102,7 @@ class TestSeleniumResponse:
     """Tests SeleniumResponse.follow method"""
 
     @pytest.mark.parametrize(
-        ('reachable_urls', 'followed_urls'), [({'http://foo.com'}, set()), (set(), {'http://foo.com'})]
+        ('reachable_urls', 'followed_urls'), [(FOO_URLS, set()), (frozenset(), {'http://foo.com'})]
     )
     async def test_should_not_follow_already_processed_url(self, mocker, chrome_driver, reachable_urls, followed_urls):
         logger_mock = mocker.patch('logging.Logger.debug')
@@ -69,12 +122,25 @@ class TestSeleniumResponse:
         response = SeleniumResponse(
             driver=chrome_driver,
             handle='4',
-            reachable_urls={'http://bar.com'},
+            reachable_urls=BAR_URLS,
             followed_urls=set(),
             queue=Queue(size=1),
         )
         await response.follow(url)
 
-        assert {'http://bar.com'} == response._reachable_urls
+        assert BAR_URLS == response._reachable_urls
         assert {url} == response._followed_urls
         assert 1 == response._queue.length
+
+    async def test_should_wait_for_element_presence_in_a_worker_thread(self, mocker):
+        wait_mock = mocker.patch('scalpel.core.response.WebDriverWait')
+        run_sync_spy = mocker.spy(anyio.to_thread, 'run_sync')
+        driver = mocker.Mock(spec=WebDriver)
+        response = SeleniumResponse(
+            driver=driver, handle='4', reachable_urls=set(), followed_urls=set(), queue=Queue(), find_timeout=3
+        )
+        element = await response.wait_for((By.CSS_SELECTOR, 'p'))
+
+        run_sync_spy.assert_called_once()
+        wait_mock.assert_called_once_with(driver, 3)
+        assert wait_mock.return_value.until.return_value is element
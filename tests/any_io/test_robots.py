@@ -1,12 +1,15 @@
 import collections
-from urllib.robotparser import RobotFileParser
+import os
+import time
 
+import anyio
 import httpx
 import mock
 import pytest
 import respx
 
 from scalpel.any_io.robots import RobotsAnalyzer
+from scalpel.core.robots import ROBOTS_CACHE_TTL, ROBOTS_NEGATIVE_CACHE_TTL
 from tests.helpers import assert_dicts
 
 pytestmark = pytest.mark.anyio
@@ -27,7 +30,7 @@ class TestRobotsAnalyzerInitialization:
         assert tmp_path == analyzer._robots_cache
         assert isinstance(analyzer._http_client, httpx.AsyncClient)
         assert 'Mozilla/5.0' == analyzer._http_client.headers['User-Agent']
-        assert isinstance(analyzer._robots_parser, RobotFileParser)
+        assert_dicts(analyzer._robots_parsers, {})
         assert_dicts(analyzer._robots_mapping, {})
         assert_dicts(analyzer._delay_mapping, {})
 
@@ -39,7 +42,7 @@ class TestRobotsAnalyzerInitialization:
         assert tmp_path == analyzer._robots_cache
         assert isinstance(analyzer._http_client, httpx.AsyncClient)
         assert 'python-httpx' == analyzer._http_client.headers['User-Agent']
-        assert isinstance(analyzer._robots_parser, RobotFileParser)
+        assert_dicts(analyzer._robots_parsers, {})
         assert_dicts(analyzer._robots_mapping, {})
         assert_dicts(analyzer._delay_mapping, {})
 
@@ -72,18 +75,12 @@ class TestCanFetch:
         httpx_mock.get('/robots.txt').mock(side_effect=httpx.ConnectTimeout)
         assert await anyio_analyzer.can_fetch('http://example.com/path') is False
 
-    @pytest.mark.parametrize('status_code', [401, 403])
-    async def test_should_return_false_when_robots_are_unauthorized_or_forbidden(
-        self, anyio_analyzer, httpx_mock, status_code
-    ):
-        httpx_mock.get('/robots.txt') % status_code
-
+    @pytest.mark.parametrize('robots_route', [401, 403], indirect=True)
+    async def test_should_return_false_when_robots_are_unauthorized_or_forbidden(self, anyio_analyzer, robots_route):
         assert await anyio_analyzer.can_fetch('http://example.com/path') is False
 
-    @pytest.mark.parametrize('status_code', [404, 500])
-    async def test_should_return_true_when_other_http_errors_occurred(self, anyio_analyzer, httpx_mock, status_code):
-        httpx_mock.get('/robots.txt') % status_code
-
+    @pytest.mark.parametrize('robots_route', [404, 500], indirect=True)
+    async def test_should_return_true_when_other_http_errors_occurred(self, anyio_analyzer, robots_route):
         assert await anyio_analyzer.can_fetch('http://example.com/path') is True
 
     @pytest.mark.parametrize('url_path', ['photos', 'videos'])
@@ -114,6 +111,104 @@ class TestCanFetch:
         assert await anyio_analyzer.can_fetch('http://example.com/path') is True
         assert not request.called
 
+    @respx.mock
+    async def test_should_read_cached_robots_file_only_once_per_host(
+        self, mocker, anyio_analyzer, tmp_path, robots_content
+    ):
+        robots_path = tmp_path / 'example.com'
+        robots_path.write_text(robots_content)
+        anyio_analyzer._robots_mapping['example.com'] = robots_path
+        get_lines_spy = mocker.spy(RobotsAnalyzer, '_get_robots_lines')
+
+        assert await anyio_analyzer.can_fetch('http://example.com/path') is True
+        assert await anyio_analyzer.can_fetch('http://example.com/admin/') is False
+        get_lines_spy.assert_called_once_with(robots_path)
+
+    async def test_should_use_one_robots_parser_per_host(self, anyio_analyzer):
+        with respx.mock:
+            respx.get('http://foo.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /admin/'}
+            respx.get('http://bar.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /private/'}
+
+            assert await anyio_analyzer.can_fetch('http://foo.com/admin/') is False
+            assert await anyio_analyzer.can_fetch('http://bar.com/admin/') is True
+            assert await anyio_analyzer.can_fetch('http://foo.com/private/') is True
+            assert await anyio_analyzer.can_fetch('http://bar.com/private/') is False
+        assert {'foo.com', 'bar.com'} == set(anyio_analyzer._robots_parsers)
+
+    @pytest.mark.parametrize('robots_route', [401, 403], indirect=True)
+    async def test_should_not_request_robots_again_when_access_was_recently_denied(self, anyio_analyzer, robots_route):
+        assert await anyio_analyzer.can_fetch('http://example.com/page/1') is False
+        assert await anyio_analyzer.can_fetch('http://example.com/page/2') is False
+        assert 1 == robots_route.call_count
+
+    async def test_should_not_request_robots_again_when_it_returns_other_error(self, anyio_analyzer, httpx_mock):
+        request = httpx_mock.get('/robots.txt') % 404
+
+        assert await anyio_analyzer.can_fetch('http://example.com/page/1') is True
+        assert await anyio_analyzer.can_fetch('http://example.com/page/2') is True
+        assert 1 == request.call_count
+
+    @pytest.mark.parametrize(('status_code', 'ttl'), [(200, ROBOTS_CACHE_TTL), (401, ROBOTS_NEGATIVE_CACHE_TTL)])
+    async def test_should_request_robots_again_when_cache_has_expired(
+        self, mocker, anyio_analyzer, httpx_mock, robots_content, status_code, ttl
+    ):
+        monotonic_mock = mocker.patch('scalpel.core.robots.time.monotonic', return_value=100)
+        request = httpx_mock.get('/robots.txt') % {'status_code': status_code, 'text': robots_content}
+
+        await anyio_analyzer.can_fetch('http://example.com/page')
+        monotonic_mock.return_value = 100 + ttl - 1
+        await anyio_analyzer.can_fetch('http://example.com/page')
+        assert 1 == request.call_count
+
+        monotonic_mock.return_value = 100 + ttl
+        await anyio_analyzer.can_fetch('http://example.com/page')
+        assert 2 == request.call_count
+
+    async def test_should_request_robots_url_without_query_and_fragment_of_given_url(
+        self, anyio_analyzer, robots_content
+    ):
+        with respx.mock:
+            request = respx.get('http://example.com/robots.txt') % {'text': robots_content}
+
+            assert await anyio_analyzer.can_fetch('http://example.com/page?q=foo#bar', host='example.com') is True
+            assert 'http://example.com/robots.txt' == str(request.calls.last.request.url)
+
+    @respx.mock
+    async def test_should_use_fresh_robots_file_written_by_a_previous_run(self, tmp_path, robots_content):
+        request = respx.get('http://example.com/robots.txt')
+        (tmp_path / 'example.com.robots.txt').write_text(robots_content)
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {'example.com': tmp_path / 'example.com.robots.txt'} == analyzer._robots_mapping
+        assert await analyzer.can_fetch('http://example.com/admin/') is False
+        assert not request.called
+
+    @pytest.mark.parametrize(
+        'filename', ['example.com', '.gitkeep', 'notes.txt', 'example com.robots.txt', '.robots.txt']
+    )
+    async def test_should_not_load_files_not_written_by_robots_analyzers(self, tmp_path, robots_content, filename):
+        (tmp_path / filename).write_text(robots_content)
+        (tmp_path / 'foo.com.robots.txt').mkdir()
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {} == analyzer._robots_mapping
+
+    @respx.mock
+    async def test_should_fetch_robots_file_again_when_the_one_written_by_a_previous_run_is_too_old(
+        self, tmp_path, robots_content
+    ):
+        request = respx.get('http://example.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /private/'}
+        robots_path = tmp_path / 'example.com.robots.txt'
+        robots_path.write_text(robots_content)
+        modified_time = time.time() - ROBOTS_CACHE_TTL - 1
+        os.utime(robots_path, (modified_time, modified_time))
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {} == analyzer._robots_mapping
+        assert await analyzer.can_fetch('http://example.com/admin/') is True
+        assert request.called
+        assert 'User-agent: *\nDisallow: /private/' == robots_path.read_text()
+
 
 class TestGetRequestDelay:
     """Tests method get_request_delay"""
@@ -133,6 +228,7 @@ class TestGetRequestDelay:
         httpx_mock.get('/robots.txt') % 401
 
         assert await anyio_analyzer.get_request_delay('http://example.com/page/1', 0) == -1
+        assert {} == anyio_analyzer._host_locks
 
     async def test_should_call_can_fetch_only_one_time(self, mocker, tmp_path):
         url = 'http://example.com/page/1'
@@ -142,7 +238,7 @@ class TestGetRequestDelay:
 
         assert -1 == await analyzer.get_request_delay(url, 0)
         assert -1 == await analyzer.get_request_delay(url, 0)
-        can_fetch_mock.assert_awaited_once_with(url)
+        can_fetch_mock.assert_awaited_once_with(url, host='example.com')
 
     async def test_should_return_crawl_delay_value_if_robots_txt_specified_it(
         self, httpx_mock, anyio_analyzer, robots_content
@@ -199,6 +295,55 @@ class TestGetRequestDelay:
         assert await anyio_analyzer.get_request_delay('http://example.com/page/1', 3) == 3
         crawl_delay_mock.assert_called_once_with('*')
 
+    async def test_should_compute_delay_with_the_robots_parser_of_the_url_host(self, anyio_analyzer):
+        with respx.mock:
+            respx.get('http://foo.com/robots.txt') % {'text': 'User-agent: *\nCrawl-delay: 2'}
+            respx.get('http://bar.com/robots.txt') % {'text': 'User-agent: *\nCrawl-delay: 5'}
+
+            assert 2 == await anyio_analyzer.get_request_delay('http://foo.com/page', 0)
+            assert 5 == await anyio_analyzer.get_request_delay('http://bar.com/page', 0)
+
+
+class TestPrefetch:
+    """Tests method prefetch"""
+
+    async def test_should_fetch_robots_file_once_when_host_is_prefetched_and_looked_up_concurrently(
+        self, anyio_analyzer, httpx_mock, robots_content
+    ):
+        request = httpx_mock.get('/robots.txt') % {'text': robots_content + '\nCrawl-delay: 2'}
+        delays = []
+
+        async def get_delay():
+            delays.append(await anyio_analyzer.get_request_delay('http://example.com/page/2', 0))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(anyio_analyzer.prefetch, 'http://example.com/page/1', 0)
+            tg.start_soon(get_delay)
+
+        assert [2] == delays
+        assert 1 == request.call_count
+        assert {} == anyio_analyzer._host_locks
+
+    async def test_should_cache_robots_file_and_request_delay(self, anyio_analyzer, httpx_mock, robots_content):
+        request = httpx_mock.get('/robots.txt') % {'text': robots_content + '\nCrawl-delay: 2'}
+        await anyio_analyzer.prefetch('http://example.com/page/1', 0)
+
+        assert 'example.com' in anyio_analyzer._robots_mapping
+        assert 2 == anyio_analyzer._delay_mapping['example.com']
+        assert await anyio_analyzer.can_fetch('http://example.com/page/2') is True
+        assert 2 == await anyio_analyzer.get_request_delay('http://example.com/page/2', 0)
+        assert 1 == request.call_count
+
+    async def test_should_log_error_when_robots_file_cannot_be_fetched(self, mocker, anyio_analyzer, httpx_mock):
+        logger_mock = mocker.patch('logging.Logger.exception')
+        httpx_mock.get('/robots.txt').mock(side_effect=httpx.ConnectError)
+        await anyio_analyzer.prefetch('http://example.com/page/1', 0)
+
+        logger_mock.assert_called_once_with(
+            'unable to prefetch robots.txt file for url %s', 'http://example.com/page/1'
+        )
+        assert {} == anyio_analyzer._host_locks
+
 
 class TestClose:
     """Tests method close"""
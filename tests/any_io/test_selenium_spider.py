@@ -1,12 +1,11 @@
+import time
 from datetime import datetime
 
+import anyio
 import httpx
 import pytest
-import respx
-
-# noinspection PyProtectedMember
-from anyio._core._synchronization import Lock
-from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from anyio.streams.memory import MemoryObjectSendStream
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.remote.webdriver import WebDriver
 
 from scalpel.any_io.files import read_mp
@@ -16,6 +15,7 @@ from scalpel.any_io.robots import RobotsAnalyzer
 from scalpel.any_io.selenium_spider import SeleniumSpider, StaticSpider
 from scalpel.core.config import Browser, Configuration
 from scalpel.core.message_pack import datetime_decoder
+from tests.helpers import QUOTES_SCRIPT
 
 pytestmark = pytest.mark.anyio
 
@@ -26,16 +26,17 @@ class TestSeleniumSpider:
     def test_selenium_spider_class_is_a_subclass_of_static_spider(self):
         assert issubclass(SeleniumSpider, StaticSpider)
 
-    async def test_selenium_attributes_are_correctly_instantiated(self):
+    async def test_selenium_attributes_are_correctly_instantiated(self, fake_browsers):
         config = Configuration(selenium_driver_log_file=None)
         spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
 
-        assert isinstance(spider._driver, WebDriver)
+        assert 1 == len(spider._drivers)
+        assert isinstance(spider._drivers[0], WebDriver)
         assert isinstance(spider._start_time, float)
         assert isinstance(spider._http_client, httpx.AsyncClient)
         assert isinstance(spider._robots_analyser, RobotsAnalyzer)
         assert config == spider._config
-        assert isinstance(spider._lock, Lock)
+        assert isinstance(spider._items_send_stream, MemoryObjectSendStream)
         assert isinstance(spider._queue, Queue)
 
         # cleanup
@@ -44,13 +45,14 @@ class TestSeleniumSpider:
     # _get_selenium_response test
 
     @pytest.mark.parametrize(('browser', 'handle'), [(Browser.FIREFOX, '4'), (Browser.CHROME, '4')])
-    async def test_should_return_selenium_response_when_giving_correct_input(self, browser, handle):
+    async def test_should_return_selenium_response_when_giving_correct_input(self, fake_browsers, browser, handle):
         config = Configuration(selenium_driver_log_file=None, selenium_browser=browser)
         spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
-        response = spider._get_selenium_response(handle)
+        response = spider._get_selenium_response(spider._drivers[0], handle)
 
+        fake_browsers[browser].assert_called_once()
         assert isinstance(response, SeleniumResponse)
-        assert response.driver is spider._driver
+        assert response.driver is spider._drivers[0]
         assert response.handle == handle
         assert response._reachable_urls == spider.reachable_urls
         assert response._followed_urls == spider.followed_urls
@@ -59,6 +61,66 @@ class TestSeleniumSpider:
         # cleanup
         await spider._cleanup()
 
+    # _lease_driver test
+
+    async def test_should_lease_each_driver_of_the_pool_once_at_a_time(self, mocker):
+        mocker.patch('selenium.webdriver.Firefox', side_effect=lambda **_: mocker.MagicMock())
+        config = Configuration(selenium_driver_log_file=None, selenium_pool_size=2)
+        spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        async with spider._lease_driver() as driver_1:
+            async with spider._lease_driver() as driver_2:
+                assert {driver_1, driver_2} == set(spider._drivers)
+                assert [] == spider._free_drivers
+                assert 0 == spider._driver_semaphore.value
+
+        assert 2 == len(spider._free_drivers)
+        assert 2 == spider._driver_semaphore.value
+
+    # _get_resource test
+
+    async def test_should_load_page_in_a_worker_thread(self, mocker):
+        mocker.patch('selenium.webdriver.Firefox')
+        run_sync_spy = mocker.spy(anyio.to_thread, 'run_sync')
+        driver = mocker.MagicMock()
+        spider = SeleniumSpider(
+            urls=['http://foo.com'], parse=lambda x, y: None, config=Configuration(selenium_driver_log_file=None)
+        )
+
+        assert (False, mocker.ANY) == await spider._get_resource(driver, 'http://foo.com')
+        driver.get.assert_called_once_with('http://foo.com')
+        run_sync_spy.assert_called_once_with(driver.get, 'http://foo.com')
+
+    async def test_should_wait_for_page_load_when_cancelled_before_releasing_driver(self, mocker):
+        loaded_urls = []
+
+        def get(url):
+            time.sleep(0.2)
+            loaded_urls.append(url)
+
+        mocker.patch('selenium.webdriver.Firefox', side_effect=lambda **_: mocker.MagicMock(get=get))
+        spider = SeleniumSpider(
+            urls=['http://foo.com'], parse=lambda x, y: None, config=Configuration(selenium_driver_log_file=None)
+        )
+        with anyio.move_on_after(0.05):
+            async with spider._lease_driver() as driver:
+                await spider._get_resource(driver, 'http://foo.com')
+
+        assert ['http://foo.com'] == loaded_urls
+        assert [driver] == spider._free_drivers
+
+    async def test_should_return_unreachable_url_when_page_cannot_be_loaded(self, mocker):
+        mocker.patch('selenium.webdriver.Firefox')
+        logger_mock = mocker.patch('logging.Logger.exception')
+        driver = mocker.MagicMock()
+        driver.get.side_effect = WebDriverException
+        spider = SeleniumSpider(
+            urls=['http://foo.com'], parse=lambda x, y: None, config=Configuration(selenium_driver_log_file=None)
+        )
+
+        assert (True, 0) == await spider._get_resource(driver, 'http://foo.com')
+        logger_mock.assert_called_once_with('unable to get resource at http://foo.com')
+
     # _handle_url test
 
     @pytest.mark.parametrize(
@@ -66,7 +128,7 @@ class TestSeleniumSpider:
         [(set(), set(), {'http://foo.com'}), (set(), {'http://foo.com'}, set()), ({'http://foo.com'}, set(), set())],
     )
     async def test_should_do_nothing_if_url_is_already_present_in_one_url_set(
-        self, mocker, reachable_urls, unreachable_urls, robots_excluded_urls
+        self, mocker, fake_browsers, reachable_urls, unreachable_urls, robots_excluded_urls
     ):
         url = 'http://foo.com'
         logger_mock = mocker.patch('logging.Logger.debug')
@@ -125,7 +187,6 @@ class TestSeleniumSpider:
         # cleanup
         await spider._cleanup()
 
-    @respx.mock
     async def test_should_not_called_parse_method_if_url_is_not_accessible(self, mocker):
         parse_args = []
         url = 'http://foo.com'
@@ -133,7 +194,6 @@ class TestSeleniumSpider:
         async def parse(sel_spider, response):
             parse_args.extend([sel_spider, response])
 
-        respx.get(f'{url}/robots.txt') % 404
         mocker.patch('selenium.webdriver.remote.webdriver.WebDriver.get', side_effect=WebDriverException)
         config = Configuration(follow_robots_txt=True, selenium_driver_log_file=None)
         spider = SeleniumSpider(urls=[url], parse=parse, config=config)
@@ -167,7 +227,7 @@ class TestSeleniumSpider:
         assert parse_args[0] is spider
         selenium_response = parse_args[1]
         assert isinstance(selenium_response, SeleniumResponse)
-        assert selenium_response.driver is spider._driver
+        assert selenium_response.driver is spider._drivers[0]
         assert 'handle' == selenium_response.handle
         assert {url} == spider.reachable_urls
         assert 1 == spider.request_counter
@@ -220,24 +280,16 @@ class TestIntegrationSeleniumSpider:
 
     @staticmethod
     async def parse(spider: SeleniumSpider, response: SeleniumResponse) -> None:
-        quotes = [element.text for element in response.driver.find_elements_by_xpath('//blockquote/p')]
-        authors = [element.text for element in response.driver.find_elements_by_xpath('//blockquote/footer')]
-
-        link = None
-        try:
-            element = response.driver.find_element_by_xpath('//a[2][contains(@href, "page")]')
-            link = element.get_attribute('href')
-        except NoSuchElementException:
-            pass
-
-        for quote, author in zip(quotes, authors):
-            await spider.save_item({'quote': quote, 'author': author})
+        quotes, authors, link = response.driver.execute_script(QUOTES_SCRIPT)
+        await spider.save_items({'quote': quote, 'author': author} for quote, author in zip(quotes, authors))
 
         if link is not None:
             await response.follow(link)
 
     @pytest.mark.parametrize('browser', [Browser.FIREFOX, Browser.CHROME])
-    async def test_should_save_correct_output_when_giving_file_url(self, page_1_file_url, tmp_path, browser):
+    async def test_should_save_correct_output_when_giving_file_url(
+        self, page_1_file_url, page_file_urls, tmp_path, browser
+    ):
         backup_path = tmp_path / 'backup.mp'
         config = Configuration(
             item_processors=[self.processor],
@@ -248,7 +300,7 @@ class TestIntegrationSeleniumSpider:
         spider = SeleniumSpider(urls=[page_1_file_url], parse=self.parse, config=config)
         await spider.run()
         stats = spider.statistics()
-        followed_urls = {page_1_file_url.replace('1', '2'), page_1_file_url.replace('1', '3')}
+        followed_urls = set(page_file_urls[1:])
 
         assert followed_urls == stats.followed_urls
         assert {page_1_file_url} | followed_urls == stats.reachable_urls
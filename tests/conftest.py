@@ -1,12 +1,59 @@
 import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, List
+from unittest import mock
 
+import httpx
 import msgpack
 import pytest
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
+from scalpel.core.config import Browser, _get_fake_user_agent
+from tests.helpers import FAKE_USER_AGENT
+
+WEBSITE_FOLDER = Path(__file__).parent / 'website'
+# naive datetimes used in tests are encoded relatively to this date, no timezone conversion is involved
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fake_user_agent():
+    """
+    Replaces fake_useragent for the whole session, so that configurations created by tests do not read its cache file or
+    download its data. Tests about the user agent can still patch it themselves.
+    """
+    with mock.patch('scalpel.core.config.UserAgent') as user_agent_mock:
+        user_agent_mock.return_value.random = FAKE_USER_AGENT
+        _get_fake_user_agent.cache_clear()
+        yield user_agent_mock
+    _get_fake_user_agent.cache_clear()
+
+
+@pytest.fixture(scope='session')
+def dummy_data():
+    return b'<html><body><p>Hello World!</p></body></html>'
+
+
+@pytest.fixture(scope='session')
+def dummy_text(dummy_data):
+    return dummy_data.decode()
+
+
+# responses are only read by tests, so they are built once for the whole session
+@pytest.fixture(scope='session')
+def httpx_response(dummy_data):
+    request = httpx.Request('GET', 'http://foobar.com')
+    return httpx.Response(200, request=request, content=dummy_data)
+
+
+@pytest.fixture(scope='session')
+def foo_httpx_response():
+    """Returns an empty httpx response of http://foo.com"""
+    return httpx.Response(200, request=httpx.Request('GET', 'http://foo.com'))
+
 
 @pytest.fixture(scope='session')
 def robots_content():
@@ -25,9 +72,10 @@ def robots_content():
 def encode_datetime():
     """Factory fixture providing a msgpack encoder for datetime objects."""
 
+    # an integer number of microseconds is exact and much cheaper to encode and parse than a formatted string
     def _encode_datetime(obj):
         if isinstance(obj, datetime.datetime):
-            return {'__datetime__': True, 'as_str': obj.strftime("%Y%m%dT%H:%M:%S.%f")}
+            return {'__datetime__': True, 'us': (obj - EPOCH) // MICROSECOND}
         return obj
 
     return _encode_datetime
@@ -39,7 +87,7 @@ def decode_datetime():
 
     def _decode_datetime(obj):
         if '__datetime__' in obj:
-            obj = datetime.datetime.strptime(obj["as_str"], "%Y%m%dT%H:%M:%S.%f")
+            obj = EPOCH + datetime.timedelta(microseconds=obj['us'])
         return obj
 
     return _decode_datetime
@@ -48,41 +96,54 @@ def decode_datetime():
 @pytest.fixture(scope='session')
 def create_msgpack_file(encode_datetime):
     """Factory fixture to create msgpack files."""
+    # the packer resets itself after each item, so it can be shared by all the files created during the session
+    packer = msgpack.Packer(default=encode_datetime)
 
     # noinspection PyTypeChecker
     def _create_msgpack_file(path: Path, data: List[Any]):
-        packer = msgpack.Packer(autoreset=False, default=encode_datetime)
-        for item in data:
-            packer.pack(item)
         with open(path, 'wb') as f:
-            f.write(packer.getbuffer())
-
-        packer.reset()
+            for item in data:
+                f.write(packer.pack(item))
 
     return _create_msgpack_file
 
 
 @pytest.fixture(scope='session')
-def page_1_file_url():
+def msgpack_data_file(tmp_path_factory, create_msgpack_file):
+    """Returns a msgpack file written once for tests which only read it, and the items it contains"""
+    data = [[1, 2], 'hello', {'fruit': 'apple'}]
+    path = tmp_path_factory.mktemp('msgpack') / 'data.mp'
+    create_msgpack_file(path, data)
+    return path, data
+
+
+@pytest.fixture(scope='session')
+def page_file_urls():
+    """Returns file urls of website/page1.html, website/page2.html and website/page3.html"""
+    return [(WEBSITE_FOLDER / f'page{number}.html').as_uri() for number in range(1, 4)]
+
+
+@pytest.fixture(scope='session')
+def page_1_file_url(page_file_urls):
     """Returns file url of website/page1.html"""
-    p = Path(__file__).parent / 'website' / 'page1.html'
-    return p.as_uri()
+    return page_file_urls[0]
 
 
 @pytest.fixture(scope='session')
 def page_content():
     """Returns function factory to get page content of each html page in website folder"""
 
+    # the same pages are read by many tests, so each one is only read once from the disk
+    @lru_cache(maxsize=32)
     def _page_content(page: str):
-        p = Path(__file__).parent / 'website' / page
-        return p.read_text()
+        return (WEBSITE_FOLDER / page).read_text()
 
     return _page_content
 
 
-@pytest.fixture()
-def chrome_driver():
-    """Returns an instance of a selenium chrome driver"""
+@pytest.fixture(scope='session')
+def chrome_session_driver():
+    """Returns a selenium chrome driver started once for the whole test session"""
     options = ChromeOptions()
     options.add_argument('--headless')
     driver = webdriver.Chrome(options=options)
@@ -90,3 +151,34 @@ def chrome_driver():
         yield driver
     finally:
         driver.quit()
+
+
+@pytest.fixture()
+def chrome_driver(chrome_session_driver):
+    """Returns the session chrome driver and resets its state after the test"""
+    yield chrome_session_driver
+
+    driver = chrome_session_driver
+    for handle in driver.window_handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(driver.window_handles[0])
+    driver.delete_all_cookies()
+    driver.get('about:blank')
+
+
+@pytest.fixture()
+def fake_browsers(mocker):
+    """
+    Replaces selenium browser classes by mocks creating fake drivers, so that tests which do not load pages do not
+    start a browser. Returns the mocks by browser.
+    """
+    # this module imports urllib3 and ssl, it is imported here so that green tests can monkey-patch them first
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    return {
+        browser: mocker.patch(
+            f'selenium.webdriver.{browser.name.title()}', side_effect=lambda **_: mocker.Mock(spec=WebDriver)
+        )
+        for browser in Browser
+    }
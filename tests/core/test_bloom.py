@@ -0,0 +1,36 @@
+import pytest
+
+from scalpel.core.bloom import BloomFilter
+
+
+class TestBloomFilter:
+    """Tests class BloomFilter"""
+
+    @pytest.mark.parametrize(('capacity', 'error_rate'), [(1000, 0.01), (10, 0.1)])
+    def test_should_compute_size_and_hash_count_from_capacity_and_error_rate(self, capacity, error_rate):
+        bloom = BloomFilter(capacity, error_rate)
+
+        assert bloom._size >= capacity
+        assert bloom._hash_count >= 1
+        assert len(bloom._bits) * 8 >= bloom._size
+
+    def test_should_not_contain_items_that_were_not_added(self):
+        bloom = BloomFilter(100)
+
+        assert 'http://foo.com' not in bloom
+
+    def test_should_contain_all_added_items(self):
+        urls = [f'http://foo.com/page{i}.html' for i in range(1000)]
+        bloom = BloomFilter(1000)
+        for url in urls:
+            bloom.add(url)
+
+        assert all(url in bloom for url in urls)
+
+    def test_false_positive_rate_should_be_close_to_error_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'http://foo.com/page{i}.html')
+
+        false_positives = sum(f'http://bar.com/page{i}.html' in bloom for i in range(10_000))
+        assert false_positives < 300
@@ -8,9 +8,16 @@ import pytest
 from configuror import DecodeError
 from fake_useragent import FakeUserAgentError
 
-from scalpel.core.config import Browser, Configuration, bool_converter, callable_list_converter
+from scalpel.core.config import (
+    DEFAULT_QUEUE_MAXSIZE,
+    Browser,
+    Configuration,
+    _get_fake_user_agent,
+    bool_converter,
+    callable_list_converter,
+)
 from scalpel.core.message_pack import datetime_decoder, datetime_encoder
-from tests.helpers import assert_dicts
+from tests.helpers import FAKE_USER_AGENT, assert_dicts
 
 
 @pytest.fixture(scope='module')
@@ -22,10 +29,12 @@ def default_config():
         path.rmdir()
 
 
-@pytest.fixture
-def math_module(monkeypatch, tmp_path):
-    monkeypatch.setattr(sys, 'path', [*sys.path, f'{tmp_path}'])
-    python_file = tmp_path / 'custom_math.py'
+@pytest.fixture(scope='session')
+def math_module(tmp_path_factory):
+    # once imported, the module is taken from sys.modules, so there is no need to write it for each test
+    folder = tmp_path_factory.mktemp('modules')
+    sys.path.append(f'{folder}')
+    python_file = folder / 'custom_math.py'
     lines = """
 def add(a, b):
     return a + b
@@ -34,7 +43,37 @@ def minus(a, b):
     return a - b
     """
     python_file.write_text(lines)
-    return import_module(python_file.stem)
+    yield import_module(python_file.stem)
+    sys.path.remove(f'{folder}')
+    sys.modules.pop(python_file.stem, None)
+
+
+@pytest.fixture(scope='module')
+def yaml_file(tmp_path_factory):
+    lines = """---
+    scalpel:
+      fetch_timeout: 4.0
+      user_agent: Mozilla/5.0
+      follow_robots_txt: true
+      foo: bar
+    """
+    yaml_file = tmp_path_factory.mktemp('yaml') / 'settings.yml'
+    yaml_file.write_text(lines)
+    return yaml_file
+
+
+@pytest.fixture(scope='module')
+def toml_file(tmp_path_factory):
+    toml_file = tmp_path_factory.mktemp('toml') / 'settings.toml'
+    lines = """
+    [scalpel]
+    foo = "bar"
+    user_agent = "Mozilla/5.0"
+    fetch_timeout = 4.0
+    follow_robots_txt = true
+    """
+    toml_file.write_text(lines)
+    return toml_file
 
 
 class TestBoolConverter:
@@ -196,10 +235,9 @@ class TestUserAgentAttribute:
         with pytest.raises(TypeError):
             Configuration(user_agent=value)
 
-    # todo: may be I should mock UserAgent to prevent failures when the sources
-    #  can't be downloaded. Or skipped test if it is not run on CI?
+    # fake_useragent is replaced by the session fixture fake_user_agent, so this test does not depend on the network
     def test_default_value_is_a_string_when_fake_user_agent_does_not_fail(self, default_config):
-        assert isinstance(default_config.user_agent, str)
+        assert FAKE_USER_AGENT == default_config.user_agent
 
     def test_default_value_is_a_string_when_fake_user_agent_fails(self, mocker):
         class FailUserAgent:
@@ -207,10 +245,22 @@ class TestUserAgentAttribute:
                 raise FakeUserAgentError
 
         mocker.patch('scalpel.core.config.UserAgent', new=FailUserAgent)
+        _get_fake_user_agent.cache_clear()
 
         config = Configuration()
         assert config.user_agent.startswith('Mozilla/5.0')
 
+    def test_should_create_fake_user_agent_only_once(self, mocker):
+        user_agent_mock = mocker.patch('scalpel.core.config.UserAgent')
+        user_agent_mock.return_value.random = 'Mozilla/5.0 (X11; Linux x86_64)'
+        _get_fake_user_agent.cache_clear()
+
+        for _ in range(3):
+            assert 'Mozilla/5.0 (X11; Linux x86_64)' == Configuration().user_agent
+
+        user_agent_mock.assert_called_once_with()
+        _get_fake_user_agent.cache_clear()
+
 
 # noinspection PyTypeChecker
 class TestFollowRobotsTxt:
@@ -260,6 +310,51 @@ class TestBackupFilename:
         assert 'backup-84a49591-c522-4a1c-971c-cf0282c6a759.mp' == config.backup_filename
 
 
+class TestBackupBatchSize:
+    """Checks attribute backup_batch_size"""
+
+    def test_should_raise_error_when_value_does_not_represent_an_integer(self):
+        with pytest.raises(ValueError):
+            Configuration(backup_batch_size='foo')
+
+    @pytest.mark.parametrize('value', [0, -1])
+    def test_should_raise_error_when_value_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(backup_batch_size=value)
+
+        assert 'backup_batch_size must be strictly positive' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    def test_should_convert_string_to_integer(self):
+        assert 10 == Configuration(backup_batch_size='10').backup_batch_size
+
+    def test_default_value_is_1(self, default_config):
+        assert 1 == default_config.backup_batch_size
+
+
+class TestBackupFlushInterval:
+    """Checks attribute backup_flush_interval"""
+
+    def test_should_raise_error_when_value_does_not_represent_a_number(self):
+        with pytest.raises(ValueError):
+            Configuration(backup_flush_interval='foo')
+
+    @pytest.mark.parametrize('value', [0, -1.5])
+    def test_should_raise_error_when_value_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(backup_flush_interval=value)
+
+        assert 'backup_flush_interval must be strictly positive' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    @pytest.mark.parametrize('value', [2, '2.5'])
+    def test_should_convert_value_to_float(self, value):
+        assert float(value) == Configuration(backup_flush_interval=value).backup_flush_interval
+
+    def test_default_value_is_none(self, default_config):
+        assert default_config.backup_flush_interval is None
+
+
 class TestSeleniumDriverLogPath:
     """Checks attribute selenium_driver_log_path"""
 
@@ -355,6 +450,28 @@ class TestSeleniumDriverExecutablePath:
         assert expected == config.selenium_driver_executable_path
 
 
+class TestSeleniumPoolSize:
+    """Checks attribute selenium_pool_size"""
+
+    def test_should_raise_error_when_value_does_not_represent_an_integer(self):
+        with pytest.raises(ValueError):
+            Configuration(selenium_pool_size='foo')
+
+    @pytest.mark.parametrize('value', [0, -1])
+    def test_should_raise_error_when_value_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(selenium_pool_size=value)
+
+        assert 'selenium_pool_size must be strictly positive' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    def test_should_convert_string_to_integer(self):
+        assert 3 == Configuration(selenium_pool_size='3').selenium_pool_size
+
+    def test_default_value_is_1(self, default_config):
+        assert 1 == default_config.selenium_pool_size
+
+
 # noinspection PyTypeChecker
 class TestRobotsCacheFolder:
     """Checks attribute robots_cache_folder"""
@@ -501,6 +618,117 @@ class TestMsgPackAttributes:
         assert datetime_encoder is default_config.msgpack_encoder
 
 
+class TestBloomAttributes:
+    """Checks attributes bloom_capacity and bloom_error_rate"""
+
+    # noinspection PyTypeChecker
+    @pytest.mark.parametrize('parameter', [{'bloom_capacity': 'foo'}, {'bloom_error_rate': 'foo'}])
+    def test_should_raise_error_when_value_does_not_represent_a_number(self, parameter):
+        with pytest.raises(ValueError):
+            Configuration(**parameter)
+
+    @pytest.mark.parametrize('value', [0, -1])
+    def test_should_raise_error_when_bloom_capacity_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(bloom_capacity=value)
+
+        assert 'bloom_capacity must be strictly positive' == str(exc_info.value)
+
+    @pytest.mark.parametrize('value', [0, 1, 1.5])
+    def test_should_raise_error_when_bloom_error_rate_is_not_between_0_and_1(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(bloom_error_rate=value)
+
+        assert 'bloom_error_rate must be between 0 and 1 (both excluded)' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    def test_should_convert_string_values(self):
+        config = Configuration(bloom_capacity='1000', bloom_error_rate='0.1')
+
+        assert 1000 == config.bloom_capacity
+        assert 0.1 == config.bloom_error_rate
+
+    def test_default_values(self, default_config):
+        assert default_config.bloom_capacity is None
+        assert 0.01 == default_config.bloom_error_rate
+
+
+class TestQueueMaxsize:
+    """Checks attribute queue_maxsize"""
+
+    def test_should_raise_error_when_value_does_not_represent_an_integer(self):
+        with pytest.raises(ValueError):
+            Configuration(queue_maxsize='foo')
+
+    @pytest.mark.parametrize('value', [0, -1])
+    def test_should_raise_error_when_value_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(queue_maxsize=value)
+
+        assert 'queue_maxsize must be strictly positive' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    def test_should_convert_string_to_integer(self):
+        assert 10 == Configuration(queue_maxsize='10').queue_maxsize
+
+    def test_should_accept_none_to_not_bound_the_queue(self):
+        assert Configuration(queue_maxsize=None).queue_maxsize is None
+
+    def test_default_value(self, default_config):
+        assert DEFAULT_QUEUE_MAXSIZE == default_config.queue_maxsize
+
+    def test_default_value_is_none_when_pool_size_is_set(self):
+        assert Configuration(pool_size=10).queue_maxsize is None
+
+
+class TestPoolSize:
+    """Checks attribute pool_size"""
+
+    def test_should_raise_error_when_value_does_not_represent_an_integer(self):
+        with pytest.raises(ValueError):
+            Configuration(pool_size='foo')
+
+    @pytest.mark.parametrize('value', [0, -1])
+    def test_should_raise_error_when_value_is_not_strictly_positive(self, value):
+        with pytest.raises(ValueError) as exc_info:
+            Configuration(pool_size=value)
+
+        assert 'pool_size must be strictly positive' == str(exc_info.value)
+
+    # noinspection PyTypeChecker
+    def test_should_convert_string_to_integer(self):
+        assert 100 == Configuration(pool_size='100').pool_size
+
+    def test_default_value_is_none(self, default_config):
+        assert default_config.pool_size is None
+
+
+# noinspection PyTypeChecker
+class TestHttp2:
+    """Checks attribute http2"""
+
+    @pytest.mark.parametrize('value', [1, 1.0])
+    def test_should_raise_type_error_when_value_is_neither_a_string_nor_a_boolean(self, value):
+        with pytest.raises(TypeError):
+            Configuration(http2=value)
+
+    def test_should_raise_error_when_h2_package_is_not_installed(self, mocker):
+        mocker.patch('scalpel.core.config.import_module', side_effect=ImportError)
+        with pytest.raises(ImportError):
+            Configuration(http2=True)
+
+    @pytest.mark.parametrize(('given_value', 'expected_value'), [('yes', True), ('0', False)])
+    def test_should_convert_string_to_correct_boolean_value(self, mocker, given_value, expected_value):
+        import_mock = mocker.patch('scalpel.core.config.import_module')
+        config = Configuration(http2=given_value)
+
+        assert config.http2 is expected_value
+        assert import_mock.called is expected_value
+
+    def test_default_value_is_false(self, default_config):
+        assert default_config.http2 is False
+
+
 class TestMethodGetDictWithLowerKeys:
     """tests method _get_dict_with_lower_keys"""
 
@@ -568,23 +796,13 @@ class TestLoadFromYaml:
 
         assert f'yaml file must be of type Path or str but you provided {type(yaml_file)}' == str(exc_info.value)
 
-    def test_should_return_correct_config_when_given_correct_yaml_file(self, tmp_path):
-        lines = """---
-        scalpel:
-          fetch_timeout: 4.0
-          user_agent: Mozilla/5.0
-          follow_robots_txt: true
-          foo: bar
-        """
-        yaml_file = tmp_path / 'settings.yml'
-        yaml_file.write_text(lines)
-        expected_config = Configuration(fetch_timeout=4.0, user_agent='Mozilla/5.0', follow_robots_txt=True)
+    @pytest.mark.parametrize('path_type', [str, Path])
+    def test_should_return_correct_config_when_given_correct_yaml_file(self, yaml_file, path_type):
+        config = Configuration.load_from_yaml(path_type(yaml_file))
 
-        for item in [f'{yaml_file}', yaml_file]:
-            config = Configuration.load_from_yaml(item)
-            assert expected_config.fetch_timeout == config.fetch_timeout
-            assert expected_config.user_agent == config.user_agent
-            assert expected_config.follow_robots_txt == config.follow_robots_txt
+        assert 4.0 == config.fetch_timeout
+        assert 'Mozilla/5.0' == config.user_agent
+        assert config.follow_robots_txt is True
 
     def test_should_raise_error_when_file_is_not_valid_yaml(self, tmp_path):
         yaml_file = tmp_path / 'foo.yaml'
@@ -609,23 +827,13 @@ class TestLoadFromToml:
 
         assert f'toml file must be of type Path or str but you provided {type(toml_file)}' == str(exc_info.value)
 
-    def test_should_return_correct_config_when_given_correct_toml_file(self, tmp_path):
-        toml_file = tmp_path / 'settings.toml'
-        lines = """
-        [scalpel]
-        foo = "bar"
-        user_agent = "Mozilla/5.0"
-        fetch_timeout = 4.0
-        follow_robots_txt = true
-        """
-        toml_file.write_text(lines)
-        expected_config = Configuration(fetch_timeout=4.0, user_agent='Mozilla/5.0', follow_robots_txt=True)
-
-        for item in [f'{toml_file}', toml_file]:
-            config = Configuration.load_from_toml(item)
-            assert expected_config.fetch_timeout == config.fetch_timeout
-            assert expected_config.user_agent == config.user_agent
-            assert expected_config.follow_robots_txt == config.follow_robots_txt
+    @pytest.mark.parametrize('path_type', [str, Path])
+    def test_should_return_correct_config_when_given_correct_toml_file(self, toml_file, path_type):
+        config = Configuration.load_from_toml(path_type(toml_file))
+
+        assert 4.0 == config.fetch_timeout
+        assert 'Mozilla/5.0' == config.user_agent
+        assert config.follow_robots_txt is True
 
     def test_should_raise_error_when_file_is_not_valid_toml(self, tmp_path):
         toml_file = tmp_path / 'settings.toml'
@@ -0,0 +1,21 @@
+import ssl
+
+import httpx
+import pytest
+
+from scalpel.core.http import get_ssl_context
+
+
+class TestGetSslContext:
+    """Tests function get_ssl_context"""
+
+    @pytest.mark.parametrize('http2', [False, True])
+    def test_should_create_ssl_context_once_for_each_http2_value(self, mocker, http2):
+        get_ssl_context.cache_clear()
+        create_spy = mocker.spy(httpx, 'create_ssl_context')
+        context = get_ssl_context(http2)
+
+        assert isinstance(context, ssl.SSLContext)
+        assert context is get_ssl_context(http2)
+        assert context is not get_ssl_context(not http2)
+        assert 2 == create_spy.call_count
@@ -0,0 +1,26 @@
+import pytest
+
+from scalpel.core.io import read_text_file
+
+
+class TestReadTextFile:
+    """Tests function read_text_file"""
+
+    @pytest.mark.parametrize('content', ['', 'hello world', '<p>hello</p>\n' * 10_000])
+    def test_should_return_file_content(self, tmp_path, content):
+        path = tmp_path / 'page.html'
+        path.write_text(content)
+
+        assert content == read_text_file(path)
+        assert content == read_text_file(f'{path}')
+
+    def test_should_raise_error_when_file_does_not_exist(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            read_text_file(tmp_path / 'page.html')
+
+    @pytest.mark.parametrize('content', [b'hello\r\nworld\r\n', b'hello\rworld\r', b'hello\nworld\n'])
+    def test_should_translate_line_endings_like_text_mode(self, tmp_path, content):
+        path = tmp_path / 'page.html'
+        path.write_bytes(content)
+
+        assert 'hello\nworld\n' == read_text_file(path)
@@ -7,22 +7,65 @@ from scalpel.core.selenium import SeleniumDriverMixin
 from scalpel.core.spider import Spider
 
 
-class TestSeleniumDriverMixin:
-    """Tests SeleniumDriverMixin _driver attribute"""
+@attr.s
+class CustomSpider(Spider, SeleniumDriverMixin):
+    @property
+    def driver(self):
+        return self._drivers[0]
 
-    @attr.s
-    class CustomSpider(Spider, SeleniumDriverMixin):
-        @property
-        def driver(self):
-            return self._driver
 
-    @pytest.mark.parametrize(('browser', 'name'), [(Browser.CHROME, 'chrome'), (Browser.FIREFOX, 'firefox')])
-    def test_should_instantiate_correctly_driver_attribute(self, browser, name):
-        config = Configuration(selenium_browser=browser, selenium_driver_log_file=None)
-        spider = self.CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+@pytest.fixture(scope='module', params=[(Browser.CHROME, 'chrome'), (Browser.FIREFOX, 'firefox')])
+def browser_spider(request):
+    """Returns a spider with a real browser and its name, the browser is quit even if a test fails"""
+    browser, name = request.param
+    config = Configuration(selenium_browser=browser, selenium_driver_log_file=None)
+    spider = CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+    try:
+        yield spider, name
+    finally:
+        spider.driver.quit()
+
+
+class TestSeleniumDriverMixin:
+    """Tests SeleniumDriverMixin _drivers attribute"""
+
+    def test_should_instantiate_correctly_driver_attribute(self, browser_spider):
+        spider, name = browser_spider
 
         assert isinstance(spider.driver, WebDriver)
         assert name == spider.driver.name
 
-        # cleanup
-        spider.driver.quit()
+    @pytest.mark.parametrize(('browser', 'driver_class'), [(Browser.CHROME, 'Chrome'), (Browser.FIREFOX, 'Firefox')])
+    def test_should_use_eager_page_load_strategy(self, mocker, browser, driver_class):
+        driver_mock = mocker.patch(f'selenium.webdriver.{driver_class}')
+        config = Configuration(selenium_browser=browser, selenium_driver_log_file=None)
+        spider = CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert driver_mock.return_value is spider.driver
+        assert 'eager' == driver_mock.call_args[1]['desired_capabilities']['pageLoadStrategy']
+
+    @pytest.mark.parametrize(('browser', 'driver_class'), [(Browser.CHROME, 'Chrome'), (Browser.FIREFOX, 'Firefox')])
+    def test_should_set_implicit_wait_to_selenium_find_timeout(self, mocker, browser, driver_class):
+        driver_mock = mocker.patch(f'selenium.webdriver.{driver_class}')
+        config = Configuration(selenium_browser=browser, selenium_driver_log_file=None, selenium_find_timeout=4)
+        CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        driver_mock.return_value.implicitly_wait.assert_called_once_with(4.0)
+
+    def test_should_disable_images_loading(self, mocker):
+        chrome_mock = mocker.patch('selenium.webdriver.Chrome')
+        firefox_mock = mocker.patch('selenium.webdriver.Firefox')
+        for browser in Browser:
+            config = Configuration(selenium_browser=browser, selenium_driver_log_file=None)
+            CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert ['--headless', '--blink-settings=imagesEnabled=false'] == chrome_mock.call_args[1]['options'].arguments
+        assert 2 == firefox_mock.call_args[1]['options'].preferences['permissions.default.image']
+
+    def test_should_start_as_many_drivers_as_selenium_pool_size(self, mocker):
+        firefox_mock = mocker.patch('selenium.webdriver.Firefox')
+        config = Configuration(selenium_pool_size=3, selenium_driver_log_file=None)
+        spider = CustomSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert 3 == firefox_mock.call_count
+        assert [firefox_mock.return_value] * 3 == spider._drivers
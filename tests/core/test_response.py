@@ -1,72 +1,101 @@
-from typing import Union
+from types import MappingProxyType
+from typing import Dict, Optional, Union
 
 import attr
 import httpx
 import parsel
 import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
 
-from scalpel.core.response import BaseSeleniumResponse, BaseStaticResponse
+from scalpel.core.response import BaseSeleniumResponse, BaseStaticResponse, _parse_base_url, _resolve_url
 from tests.helpers import assert_dicts
 
-
-@pytest.fixture(scope='module')
-def dummy_data():
-    return b'<html><body><p>Hello World!</p></body></html>'
+BASE_STATIC_FIELDS = frozenset((attribute.name, attribute.type) for attribute in attr.fields(BaseStaticResponse))
+EXPECTED_STATIC_FIELDS = frozenset(
+    [
+        ('_httpx_response', Union[httpx._models.Response, type(None)]),
+        ('_url', str),
+        ('_text', str),
+        ('_parsel_selector', Optional[parsel.Selector]),
+        ('_cookies', Optional[Dict[str, str]]),
+    ]
+)
+RESPONSE_HEADERS = MappingProxyType({'foo': 'bar', 'set-cookie': 'name=John'})
+RESPONSE_COOKIES = MappingProxyType({'name': 'John'})
 
 
 @pytest.fixture(scope='module')
-def httpx_response(dummy_data):
-    request = httpx.Request('GET', 'http://foobar.com')
-    return httpx.Response(200, request=request, content=dummy_data)
+def static_response(httpx_response):
+    """Returns a response shared by tests which only read it, so that its page is parsed once"""
+    return BaseStaticResponse(httpx_response=httpx_response)
 
 
 class TestBaseStaticResponse:
     """Tests class BaseStaticResponse"""
 
-    def test_should_validate_properties_when_passing_url_and_text(self, dummy_data):
-        response = BaseStaticResponse(url='http://foo.com', text=dummy_data.decode())
+    def test_should_validate_properties_when_passing_url_and_text(self, dummy_data, dummy_text):
+        response = BaseStaticResponse(url='http://foo.com', text=dummy_text)
 
         assert 'http://foo.com' == response.url
         assert_dicts({}, response.headers)
         assert_dicts({}, response.cookies)
-        assert dummy_data.decode() == response.text
+        assert dummy_text == response.text
         assert dummy_data == response.content
 
     def test_should_validate_properties_when_passing_httpx_response(self):
         url = 'http://foobar.com'
         request = httpx.Request('GET', url)
-        headers = {'foo': 'bar', 'set-cookie': 'name=John'}
         content = b'hello world'
-        httpx_response = httpx.Response(200, request=request, headers=headers, content=content)
+        httpx_response = httpx.Response(200, request=request, headers=RESPONSE_HEADERS, content=content)
         response = BaseStaticResponse(httpx_response=httpx_response)
 
         assert url == response.url
-        assert_dicts({**headers, 'content-length': '11'}, response.headers)
-        assert_dicts({'name': 'John'}, response.cookies)
+        assert_dicts({**RESPONSE_HEADERS, 'content-length': '11'}, response.headers)
+        assert_dicts(RESPONSE_COOKIES, response.cookies)
         assert content == response.content
         assert content.decode() == response.text
 
-    def test_should_validate_attributes(self):
-        fields = {attribute.name: attribute.type for attribute in attr.fields(BaseStaticResponse)}
-        attributes = {
-            '_httpx_response': Union[httpx._models.Response, type(None)],
-            '_url': str,
-            '_text': str,
-            '_selector': parsel.Selector,
-        }
-        assert_dicts(fields, attributes)
-
-    def test_should_validate_that_selector_attribute_is_correctly_instantiated(self, dummy_data, httpx_response):
+    def test_should_only_extract_cookies_once_when_accessing_cookies_many_times(self, mocker):
+        request = httpx.Request('GET', 'http://foobar.com')
+        httpx_response = httpx.Response(200, request=request, headers={'set-cookie': 'name=John'})
+        cookies_spy = mocker.spy(httpx.Cookies, 'extract_cookies')
         response = BaseStaticResponse(httpx_response=httpx_response)
-        assert response._selector.get() == dummy_data.decode()
 
-    def test_should_return_correct_data_when_calling_css_method(self, httpx_response):
-        response = BaseStaticResponse(httpx_response=httpx_response)
-        assert '<p>Hello World!</p>' == response.css('p').get()
+        assert response.cookies is response.cookies
+        assert {'name': 'John'} == response.cookies
+        cookies_spy.assert_called_once()
+
+    def test_should_validate_attributes(self):
+        assert EXPECTED_STATIC_FIELDS == BASE_STATIC_FIELDS
+
+    def test_should_validate_that_selector_attribute_is_correctly_instantiated(self, dummy_text, static_response):
+        assert static_response._selector.get() == dummy_text
 
-    def test_should_return_correct_data_when_calling_xpath_method(self, httpx_response):
+    def test_should_only_create_selector_once_when_it_is_used(self, mocker, httpx_response):
+        selector_spy = mocker.spy(parsel, 'Selector')
         response = BaseStaticResponse(httpx_response=httpx_response)
-        assert '<p>Hello World!</p>' == response.xpath('//p').get()
+
+        selector_spy.assert_not_called()
+        response.css('p')
+        response.xpath('//p')
+        selector_spy.assert_called_once()
+
+    def test_should_only_log_text_length_and_not_text_content(self, mocker):
+        logger_mock = mocker.patch('logging.Logger.debug')
+        response = BaseStaticResponse(url='file:///page.html', text='<p>Hello</p>')
+
+        assert '<p>Hello</p>' == response.text
+        response.css('p')
+        logger_mock.assert_any_call('creating parsel selector with text of length %s', 12)
+        logger_mock.assert_any_call('returning response text content of length %s', 12)
+        assert all('<p>Hello</p>' not in call.args for call in logger_mock.call_args_list)
+
+    def test_should_return_correct_data_when_calling_css_method(self, static_response):
+        assert '<p>Hello World!</p>' == static_response.css('p').get()
+
+    def test_should_return_correct_data_when_calling_xpath_method(self, static_response):
+        assert '<p>Hello World!</p>' == static_response.xpath('//p').get()
 
     # tests method _get_absolute_url
 
@@ -79,9 +108,8 @@ class TestBaseStaticResponse:
             ('http://example.com', 'http://example.com'),
         ],
     )
-    def test_should_return_absolute_url_given_httpx_response(self, httpx_response, given_url, absolute_url):
-        response = BaseStaticResponse(httpx_response=httpx_response)
-        assert absolute_url == response._get_absolute_url(given_url)
+    def test_should_return_absolute_url_given_httpx_response(self, static_response, given_url, absolute_url):
+        assert absolute_url == static_response._get_absolute_url(given_url)
 
     @pytest.mark.parametrize(
         ('given_url', 'absolute_url'),
@@ -93,10 +121,30 @@ class TestBaseStaticResponse:
             ('file:///C:/path/to/file', 'file:///C:/path/to/file'),
         ],
     )
-    def test_should_return_absolute_url_given_url_and_text(self, dummy_data, given_url, absolute_url):
-        response = BaseStaticResponse(url='file:/C/foo/bar.html', text=dummy_data.decode())
+    def test_should_return_absolute_url_given_url_and_text(self, dummy_text, given_url, absolute_url):
+        response = BaseStaticResponse(url='file:/C/foo/bar.html', text=dummy_text)
         assert absolute_url == response._get_absolute_url(given_url)
 
+    def test_should_resolve_same_relative_url_only_once_for_a_given_page(self, dummy_text):
+        _resolve_url.cache_clear()
+        response = BaseStaticResponse(url='file:/C/foo/bar.html', text=dummy_text)
+
+        for _ in range(3):
+            assert 'file:/C/foo/page.html' == response._get_absolute_url('page.html')
+
+        cache_info = _resolve_url.cache_info()
+        assert 1 == cache_info.misses
+        assert 2 == cache_info.hits
+
+    def test_should_parse_page_url_only_once_when_resolving_different_relative_urls(self, dummy_text):
+        _parse_base_url.cache_clear()
+        response = BaseStaticResponse(url='file:/C/foo/bar.html', text=dummy_text)
+
+        assert 'file:/C/foo/page.html' == response._get_absolute_url('page.html')
+        assert 'file:/C/foo/other.html' == response._get_absolute_url('other.html')
+        assert 'file:/C/page.html' == response._get_absolute_url('../page.html')
+        assert 1 == _parse_base_url.cache_info().misses
+
 
 class TestBaseSeleniumResponse:
     """Tests class BaseSeleniumResponse"""
@@ -112,7 +160,7 @@ class TestBaseSeleniumResponse:
             )
 
     # noinspection PyTypeChecker
-    @pytest.mark.parametrize('handle', [4, 4.0])
+    @pytest.mark.parametrize('handle', [4, 4.0], ids=['int-handle', 'float-handle'])
     def test_should_raise_error_when_handle_does_not_have_the_correct_type(self, chrome_driver, handle):
         with pytest.raises(TypeError):
             BaseSeleniumResponse(driver=chrome_driver, handle=handle)
@@ -123,6 +171,25 @@ class TestBaseSeleniumResponse:
         except TypeError:
             pytest.fail('unexpected error when initializing BaseSeleniumResponse')
 
+    # noinspection PyTypeChecker
+    def test_should_raise_error_when_find_timeout_does_not_have_the_correct_type(self, mocker):
+        with pytest.raises(TypeError):
+            BaseSeleniumResponse(driver=mocker.Mock(spec=WebDriver), handle='4', find_timeout='foo')
+
+    # wait_for
+
+    @pytest.mark.parametrize(('timeout', 'expected_timeout'), [(None, 3), (1.5, 1.5)])
+    def test_should_wait_for_element_presence(self, mocker, timeout, expected_timeout):
+        wait_mock = mocker.patch('scalpel.core.response.WebDriverWait')
+        driver = mocker.Mock(spec=WebDriver)
+        locator = (By.CSS_SELECTOR, 'p')
+        response = BaseSeleniumResponse(driver=driver, handle='4', find_timeout=3)
+
+        element = response.wait_for(locator, timeout)
+
+        wait_mock.assert_called_once_with(driver, expected_timeout)
+        assert wait_mock.return_value.until.return_value is element
+
     # _get_absolute_url
 
     @pytest.mark.parametrize(
@@ -5,13 +5,17 @@ import pytest
 from scalpel.core.robots import RobotsMixin
 
 
-@pytest.fixture()
+@pytest.fixture(scope='module')
 def get_robots_parser(robots_content):
+    # parsers are only read by tests, so each content is parsed once and its parser shared by all the tests using it
+    parsers = {}
+
     def _get_robots_parser(additional_content: str = '') -> RobotFileParser:
-        new_content = robots_content + additional_content
-        robots = RobotFileParser()
-        robots.parse(new_content.split('\n'))
-        return robots
+        if additional_content not in parsers:
+            robots = RobotFileParser()
+            robots.parse((robots_content + additional_content).split('\n'))
+            parsers[additional_content] = robots
+        return parsers[additional_content]
 
     return _get_robots_parser
 
@@ -2,8 +2,25 @@ import pytest
 import respx
 
 
-@pytest.fixture()
-def httpx_mock():
-    """respx mock object"""
-    with respx.mock(base_url='http://example.com') as _httpx_mock:
+@pytest.fixture(scope='module')
+def module_httpx_mock():
+    """respx mock object started once per module, routes are checked per test in httpx_mock fixture"""
+    with respx.mock(base_url='http://example.com', assert_all_called=False) as _httpx_mock:
         yield _httpx_mock
+
+
+@pytest.fixture()
+def httpx_mock(module_httpx_mock):
+    """respx mock object, routes added by a test are removed after it"""
+    module_httpx_mock.snapshot()
+    try:
+        yield module_httpx_mock
+        module_httpx_mock.assert_all_called()
+    finally:
+        module_httpx_mock.rollback()
+
+
+@pytest.fixture()
+def robots_route(httpx_mock, request):
+    """robots.txt route of example.com, the response given to respx comes from the indirect parametrization"""
+    return httpx_mock.get('/robots.txt') % request.param
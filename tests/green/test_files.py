@@ -1,4 +1,5 @@
 from datetime import datetime
+from pathlib import Path
 
 import pytest
 
@@ -16,13 +17,11 @@ class TestReadMp:
 
         assert f'{decoder} is not callable' == str(exc_info.value)
 
-    def test_should_return_python_objects_when_reading_file_without_custom_decoder(self, tmp_path, create_msgpack_file):
-        given_data = [[1, 2], 'hello', {'fruit': 'apple'}]
-        mp_file = tmp_path / 'data.mp'
-        create_msgpack_file(mp_file, given_data)
+    @pytest.mark.parametrize('path_type', [str, Path])
+    def test_should_return_python_objects_when_reading_file_without_custom_decoder(self, msgpack_data_file, path_type):
+        mp_file, given_data = msgpack_data_file
 
-        for file in [mp_file, f'{mp_file}']:
-            assert [item for item in read_mp(file)] == given_data
+        assert [item for item in read_mp(path_type(mp_file))] == given_data
 
     def test_should_return_python_object_when_reading_file_with_custom_decoder(
         self, tmp_path, create_msgpack_file, decode_datetime
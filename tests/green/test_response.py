@@ -1,7 +1,8 @@
-import httpx
+import gevent
 import pytest
 from gevent.queue import JoinableQueue
 
+from scalpel.core.bloom import BloomFilter
 from scalpel.green.response import SeleniumResponse, StaticResponse
 
 
@@ -11,26 +12,25 @@ class TestStaticResponse:
     @pytest.mark.parametrize(
         ('reachable_urls', 'followed_urls'), [({'http://foo.com'}, set()), (set(), {'http://foo.com'})]
     )
-    def test_should_not_follow_already_processed_url(self, mocker, reachable_urls, followed_urls):
+    def test_should_not_follow_already_processed_url(self, foo_httpx_response, mocker, reachable_urls, followed_urls):
         logger_mock = mocker.patch('logging.Logger.debug')
         url = 'http://foo.com'
-        request = httpx.Request('GET', url)
-        httpx_response = httpx.Response(200, request=request)
         response = StaticResponse(
             reachable_urls=reachable_urls,
             followed_urls=followed_urls,
             queue=JoinableQueue(),
-            httpx_response=httpx_response,
+            httpx_response=foo_httpx_response,
         )
         response.follow(url)
         assert mocker.call('url %s has already been processed, nothing to do here', url) in logger_mock.call_args_list
 
-    def test_should_follow_unprocessed_url(self):
+    def test_should_follow_unprocessed_url(self, foo_httpx_response):
         url = 'http://foo.com'
-        request = httpx.Request('GET', url)
-        httpx_response = httpx.Response(200, request=request)
         response = StaticResponse(
-            reachable_urls={'http://bar.com'}, followed_urls=set(), queue=JoinableQueue(), httpx_response=httpx_response
+            reachable_urls={'http://bar.com'},
+            followed_urls=set(),
+            queue=JoinableQueue(),
+            httpx_response=foo_httpx_response,
         )
         response.follow(url)
 
@@ -38,6 +38,64 @@ class TestStaticResponse:
         assert {url} == response._followed_urls
         assert 1 == response._queue.qsize()
 
+    def test_should_not_check_reachable_urls_when_url_was_already_followed(self, foo_httpx_response, mocker):
+        reachable_urls = mocker.MagicMock()
+        response = StaticResponse(
+            reachable_urls=reachable_urls,
+            followed_urls={'http://foo.com/page'},
+            queue=JoinableQueue(),
+            httpx_response=foo_httpx_response,
+        )
+        response.follow('/page')
+
+        reachable_urls.__contains__.assert_not_called()
+        assert 0 == response._queue.qsize()
+
+    def test_should_not_follow_relative_url_twice(self, foo_httpx_response):
+        response = StaticResponse(
+            reachable_urls=set(), followed_urls=set(), queue=JoinableQueue(), httpx_response=foo_httpx_response
+        )
+        response.follow('/page')
+        response.follow('/page#title')
+        response.follow('http://FOO.com/page')
+
+        assert {'http://foo.com/page'} == response._followed_urls
+        assert 1 == response._queue.qsize()
+        assert 'http://foo.com/page' == response._queue.get()
+
+    def test_should_check_bloom_filter_before_url_sets(self, foo_httpx_response):
+        url = 'http://foo.com'
+        bloom = BloomFilter(100)
+        response = StaticResponse(
+            reachable_urls=set(),
+            followed_urls=set(),
+            queue=JoinableQueue(),
+            bloom=bloom,
+            httpx_response=foo_httpx_response,
+        )
+        response.follow(url)
+        response.follow(url)
+
+        assert url in bloom
+        assert {url} == response._followed_urls
+        assert 1 == response._queue.qsize()
+
+    def test_should_wait_for_a_free_slot_when_queue_is_full(self, foo_httpx_response):
+        url = 'http://foo.com'
+        queue = JoinableQueue(1, items=['http://bar.com'])
+        response = StaticResponse(
+            reachable_urls={'http://bar.com'}, followed_urls=set(), queue=queue, httpx_response=foo_httpx_response
+        )
+        greenlet = gevent.spawn(response.follow, url)
+        gevent.sleep(0)
+
+        assert not greenlet.ready()
+        assert 'http://bar.com' == queue.get()
+        greenlet.join(timeout=1)
+
+        assert greenlet.successful()
+        assert url == queue.get_nowait()
+
 
 class TestSeleniumResponse:
     """Tests Selenium.follow response"""
@@ -1,10 +1,12 @@
 import collections
-from urllib.robotparser import RobotFileParser
+import os
+import time
 
 import httpx
 import pytest
 import respx
 
+from scalpel.core.robots import ROBOTS_CACHE_TTL, ROBOTS_NEGATIVE_CACHE_TTL
 from scalpel.green.robots import RobotsAnalyzer
 from tests.helpers import assert_dicts
 
@@ -14,6 +16,14 @@ def green_analyzer(tmp_path):
     return RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
 
 
+@pytest.fixture(scope='module')
+def shared_green_analyzer(tmp_path_factory):
+    """Returns an analyzer shared by tests which only read or write files of its robots cache folder"""
+    analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path_factory.mktemp('robots'))
+    yield analyzer
+    analyzer.close()
+
+
 class TestRobotsAnalyzerInstantiation:
     """Tests __init__ method"""
 
@@ -24,7 +34,7 @@ class TestRobotsAnalyzerInstantiation:
         assert tmp_path == analyzer._robots_cache
         assert isinstance(analyzer._http_client, httpx.Client)
         assert 'Mozilla/5.0' == analyzer._http_client.headers['User-Agent']
-        assert isinstance(analyzer._robots_parser, RobotFileParser)
+        assert_dicts(analyzer._robots_parsers, {})
         assert_dicts(analyzer._robots_mapping, {})
         assert_dicts(analyzer._delay_mapping, {})
 
@@ -36,7 +46,7 @@ class TestRobotsAnalyzerInstantiation:
         assert tmp_path == analyzer._robots_cache
         assert isinstance(analyzer._http_client, httpx.Client)
         assert 'python-httpx' == analyzer._http_client.headers['User-Agent']
-        assert isinstance(analyzer._robots_parser, RobotFileParser)
+        assert_dicts(analyzer._robots_parsers, {})
         assert_dicts(analyzer._robots_mapping, {})
         assert_dicts(analyzer._delay_mapping, {})
 
@@ -44,9 +54,9 @@ class TestRobotsAnalyzerInstantiation:
 class TestCreateRobotsFile:
     """Tests method _create_robots_file"""
 
-    def test_should_create_robots_file_given_host_and_content(self, green_analyzer, robots_content):
-        robots_path = green_analyzer._robots_cache / 'foo.com'
-        green_analyzer._create_robots_file(robots_path, robots_content)
+    def test_should_create_robots_file_given_host_and_content(self, shared_green_analyzer, robots_content):
+        robots_path = shared_green_analyzer._robots_cache / 'foo.com'
+        shared_green_analyzer._create_robots_file(robots_path, robots_content)
 
         assert robots_path.read_text() == robots_content
 
@@ -54,12 +64,12 @@ class TestCreateRobotsFile:
 class TestGetRobotsLines:
     """Tests method _get_robots_lines"""
 
-    def test_should_return_robots_lines_when_giving_robots_path(self, green_analyzer, robots_content):
+    def test_should_return_robots_lines_when_giving_robots_path(self, shared_green_analyzer, robots_content):
         lines = ['Hello word\n', 'Just a good day']
-        robots_path = green_analyzer._robots_cache / 'foo.com'
+        robots_path = shared_green_analyzer._robots_cache / 'foo.com'
         robots_path.write_text(''.join(lines))
 
-        assert lines == green_analyzer._get_robots_lines(robots_path)
+        assert lines == shared_green_analyzer._get_robots_lines(robots_path)
 
 
 class TestCanFetch:
@@ -70,18 +80,12 @@ class TestCanFetch:
 
         assert green_analyzer.can_fetch('http://example.com/path') is False
 
-    @pytest.mark.parametrize('status_code', [401, 403])
-    def test_should_return_false_when_robots_are_unauthorized_or_forbidden(
-        self, green_analyzer, httpx_mock, status_code
-    ):
-        httpx_mock.get('/robots.txt') % status_code
-
+    @pytest.mark.parametrize('robots_route', [401, 403], indirect=True)
+    def test_should_return_false_when_robots_are_unauthorized_or_forbidden(self, green_analyzer, robots_route):
         assert green_analyzer.can_fetch('http://example.com/') is False
 
-    @pytest.mark.parametrize('status_code', [404, 500])
-    def test_should_return_true_when_other_http_errors_occurred(self, green_analyzer, httpx_mock, status_code):
-        httpx_mock.get('/robots.txt') % status_code
-
+    @pytest.mark.parametrize('robots_route', [404, 500], indirect=True)
+    def test_should_return_true_when_other_http_errors_occurred(self, green_analyzer, robots_route):
         assert green_analyzer.can_fetch('http://example.com/') is True
 
     @pytest.mark.parametrize('url_path', ['photos', 'videos'])
@@ -110,6 +114,100 @@ class TestCanFetch:
         assert green_analyzer.can_fetch('http://example.com/path') is True
         assert not request.called
 
+    @respx.mock
+    def test_should_read_cached_robots_file_only_once_per_host(self, mocker, green_analyzer, tmp_path, robots_content):
+        robots_path = tmp_path / 'example.com'
+        robots_path.write_text(robots_content)
+        green_analyzer._robots_mapping['example.com'] = robots_path
+        get_lines_spy = mocker.spy(RobotsAnalyzer, '_get_robots_lines')
+
+        assert green_analyzer.can_fetch('http://example.com/path') is True
+        assert green_analyzer.can_fetch('http://example.com/admin/') is False
+        get_lines_spy.assert_called_once_with(robots_path)
+
+    def test_should_use_one_robots_parser_per_host(self, green_analyzer):
+        with respx.mock:
+            respx.get('http://foo.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /admin/'}
+            respx.get('http://bar.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /private/'}
+
+            assert green_analyzer.can_fetch('http://foo.com/admin/') is False
+            assert green_analyzer.can_fetch('http://bar.com/admin/') is True
+            assert green_analyzer.can_fetch('http://foo.com/private/') is True
+            assert green_analyzer.can_fetch('http://bar.com/private/') is False
+        assert {'foo.com', 'bar.com'} == set(green_analyzer._robots_parsers)
+
+    @pytest.mark.parametrize('robots_route', [401, 403], indirect=True)
+    def test_should_not_request_robots_again_when_access_was_recently_denied(self, green_analyzer, robots_route):
+        assert green_analyzer.can_fetch('http://example.com/page/1') is False
+        assert green_analyzer.can_fetch('http://example.com/page/2') is False
+        assert 1 == robots_route.call_count
+
+    def test_should_not_request_robots_again_when_it_returns_other_error(self, green_analyzer, httpx_mock):
+        request = httpx_mock.get('/robots.txt') % 404
+
+        assert green_analyzer.can_fetch('http://example.com/page/1') is True
+        assert green_analyzer.can_fetch('http://example.com/page/2') is True
+        assert 1 == request.call_count
+
+    @pytest.mark.parametrize(('status_code', 'ttl'), [(200, ROBOTS_CACHE_TTL), (401, ROBOTS_NEGATIVE_CACHE_TTL)])
+    def test_should_request_robots_again_when_cache_has_expired(
+        self, mocker, green_analyzer, httpx_mock, robots_content, status_code, ttl
+    ):
+        monotonic_mock = mocker.patch('scalpel.core.robots.time.monotonic', return_value=100)
+        request = httpx_mock.get('/robots.txt') % {'status_code': status_code, 'text': robots_content}
+
+        green_analyzer.can_fetch('http://example.com/page')
+        monotonic_mock.return_value = 100 + ttl - 1
+        green_analyzer.can_fetch('http://example.com/page')
+        assert 1 == request.call_count
+
+        monotonic_mock.return_value = 100 + ttl
+        green_analyzer.can_fetch('http://example.com/page')
+        assert 2 == request.call_count
+
+    def test_should_request_robots_url_without_query_and_fragment_of_given_url(self, green_analyzer, robots_content):
+        with respx.mock:
+            request = respx.get('http://example.com/robots.txt') % {'text': robots_content}
+
+            assert green_analyzer.can_fetch('http://example.com/page?q=foo#bar', host='example.com') is True
+            assert 'http://example.com/robots.txt' == str(request.calls.last.request.url)
+
+    @respx.mock
+    def test_should_use_fresh_robots_file_written_by_a_previous_run(self, tmp_path, robots_content):
+        request = respx.get('http://example.com/robots.txt')
+        (tmp_path / 'example.com.robots.txt').write_text(robots_content)
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {'example.com': tmp_path / 'example.com.robots.txt'} == analyzer._robots_mapping
+        assert analyzer.can_fetch('http://example.com/admin/') is False
+        assert not request.called
+
+    @pytest.mark.parametrize(
+        'filename', ['example.com', '.gitkeep', 'notes.txt', 'example com.robots.txt', '.robots.txt']
+    )
+    def test_should_not_load_files_not_written_by_robots_analyzers(self, tmp_path, robots_content, filename):
+        (tmp_path / filename).write_text(robots_content)
+        (tmp_path / 'foo.com.robots.txt').mkdir()
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {} == analyzer._robots_mapping
+
+    @respx.mock
+    def test_should_fetch_robots_file_again_when_the_one_written_by_a_previous_run_is_too_old(
+        self, tmp_path, robots_content
+    ):
+        request = respx.get('http://example.com/robots.txt') % {'text': 'User-agent: *\nDisallow: /private/'}
+        robots_path = tmp_path / 'example.com.robots.txt'
+        robots_path.write_text(robots_content)
+        modified_time = time.time() - ROBOTS_CACHE_TTL - 1
+        os.utime(robots_path, (modified_time, modified_time))
+        analyzer = RobotsAnalyzer(user_agent='Mozilla/5.0', robots_cache=tmp_path)
+
+        assert {} == analyzer._robots_mapping
+        assert analyzer.can_fetch('http://example.com/admin/') is True
+        assert request.called
+        assert 'User-agent: *\nDisallow: /private/' == robots_path.read_text()
+
 
 class TestGetRequestDelay:
     """Tests method get_request_delay"""
@@ -137,7 +235,7 @@ class TestGetRequestDelay:
 
         assert -1 == analyzer.get_request_delay(url, 0)
         assert -1 == analyzer.get_request_delay(url, 0)
-        can_fetch_mock.assert_called_once_with(url)
+        can_fetch_mock.assert_called_once_with(url, host='example.com')
 
     def test_should_return_crawl_delay_value_if_robots_txt_specified_it(
         self, green_analyzer, httpx_mock, robots_content
@@ -188,6 +286,37 @@ class TestGetRequestDelay:
         assert 3 == green_analyzer.get_request_delay('http://example.com/page/1', 3)
         crawl_delay_mock.assert_called_once_with('*')
 
+    def test_should_compute_delay_with_the_robots_parser_of_the_url_host(self, green_analyzer):
+        with respx.mock:
+            respx.get('http://foo.com/robots.txt') % {'text': 'User-agent: *\nCrawl-delay: 2'}
+            respx.get('http://bar.com/robots.txt') % {'text': 'User-agent: *\nCrawl-delay: 5'}
+
+            assert 2 == green_analyzer.get_request_delay('http://foo.com/page', 0)
+            assert 5 == green_analyzer.get_request_delay('http://bar.com/page', 0)
+
+
+class TestPrefetch:
+    """Tests method prefetch"""
+
+    def test_should_cache_robots_file_and_request_delay(self, green_analyzer, httpx_mock, robots_content):
+        request = httpx_mock.get('/robots.txt') % {'text': robots_content + '\nCrawl-delay: 2'}
+        green_analyzer.prefetch('http://example.com/page/1', 0)
+
+        assert 'example.com' in green_analyzer._robots_mapping
+        assert 2 == green_analyzer._delay_mapping['example.com']
+        assert green_analyzer.can_fetch('http://example.com/page/2') is True
+        assert 2 == green_analyzer.get_request_delay('http://example.com/page/2', 0)
+        assert 1 == request.call_count
+
+    def test_should_log_error_when_robots_file_cannot_be_fetched(self, mocker, green_analyzer, httpx_mock):
+        logger_mock = mocker.patch('logging.Logger.exception')
+        httpx_mock.get('/robots.txt').mock(side_effect=httpx.ConnectError)
+        green_analyzer.prefetch('http://example.com/page/1', 0)
+
+        logger_mock.assert_called_once_with(
+            'unable to prefetch robots.txt file for url %s', 'http://example.com/page/1'
+        )
+
 
 class TestClose:
     """Tests method close"""
@@ -6,7 +6,7 @@ import respx
 from gevent.lock import RLock
 from gevent.pool import Pool
 from gevent.queue import JoinableQueue
-from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.remote.webdriver import WebDriver
 
 from scalpel.core.config import Browser, Configuration
@@ -14,6 +14,7 @@ from scalpel.core.message_pack import datetime_decoder
 from scalpel.green import read_mp
 from scalpel.green.robots import RobotsAnalyzer
 from scalpel.green.selenium_spider import SeleniumResponse, SeleniumSpider, StaticSpider
+from tests.helpers import QUOTES_SCRIPT
 
 
 class TestSeleniumSpider:
@@ -22,7 +23,7 @@ class TestSeleniumSpider:
     def test_selenium_spider_class_is_a_subclass_of_static_spider(self):
         assert issubclass(SeleniumSpider, StaticSpider)
 
-    def test_selenium_attributes_are_correctly_instantiated(self):
+    def test_selenium_attributes_are_correctly_instantiated(self, fake_browsers):
         config = Configuration(selenium_driver_log_file=None)
         spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
         assert isinstance(spider._start_time, float)
@@ -33,7 +34,8 @@ class TestSeleniumSpider:
         assert isinstance(spider._queue, JoinableQueue)
         assert len(spider.urls) == spider._queue.qsize()
         assert isinstance(spider._pool, Pool)
-        assert isinstance(spider._driver, WebDriver)
+        assert 1 == len(spider._drivers)
+        assert isinstance(spider._drivers[0], WebDriver)
 
         # cleanup
         spider._cleanup()
@@ -41,21 +43,36 @@ class TestSeleniumSpider:
     # _get_selenium_response test
 
     @pytest.mark.parametrize(('browser', 'handle'), [(Browser.FIREFOX, '4'), (Browser.CHROME, '4')])
-    def test_should_return_selenium_response_when_giving_correct_input(self, browser, handle):
+    def test_should_return_selenium_response_when_giving_correct_input(self, fake_browsers, browser, handle):
         config = Configuration(selenium_driver_log_file=None, selenium_browser=browser)
         spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
-        response = spider._get_selenium_response(handle)
+        response = spider._get_selenium_response(spider._drivers[0], handle)
 
+        fake_browsers[browser].assert_called_once()
         assert isinstance(response, SeleniumResponse)
         assert response._reachable_urls == spider.reachable_urls
         assert response._followed_urls == spider.followed_urls
         assert response._queue == spider._queue
-        assert response.driver is spider._driver
+        assert response.driver is spider._drivers[0]
         assert response.handle == handle
 
         # cleanup
         spider._cleanup()
 
+    # _lease_driver test
+
+    def test_should_lease_each_driver_of_the_pool_once_at_a_time(self, mocker):
+        mocker.patch('selenium.webdriver.Firefox', side_effect=lambda **_: mocker.MagicMock())
+        config = Configuration(selenium_driver_log_file=None, selenium_pool_size=2)
+        spider = SeleniumSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        with spider._lease_driver() as driver_1:
+            with spider._lease_driver() as driver_2:
+                assert {driver_1, driver_2} == set(spider._drivers)
+                assert spider._free_drivers.empty()
+
+        assert 2 == spider._free_drivers.qsize()
+
     # _handle_url test
 
     @pytest.mark.parametrize(
@@ -63,7 +80,7 @@ class TestSeleniumSpider:
         [(set(), set(), {'http://foo.com'}), (set(), {'http://foo.com'}, set()), ({'http://foo.com'}, set(), set())],
     )
     def test_should_do_nothing_if_url_is_already_present_in_one_url_set(
-        self, mocker, reachable_urls, unreachable_urls, robots_excluded_urls
+        self, mocker, fake_browsers, reachable_urls, unreachable_urls, robots_excluded_urls
     ):
         url = 'http://foo.com'
         logger_mock = mocker.patch('logging.Logger.debug')
@@ -187,7 +204,7 @@ class TestSeleniumSpider:
         assert parse_args[0] is spider
         selenium_response = parse_args[1]
         assert isinstance(selenium_response, SeleniumResponse)
-        assert selenium_response.driver is spider._driver
+        assert selenium_response.driver is spider._drivers[0]
         assert 'handle' == selenium_response.handle
         assert {url} == spider.reachable_urls
         assert set() == spider.unreachable_urls
@@ -240,23 +257,14 @@ class TestIntegrationSeleniumSpider:
 
     @staticmethod
     def parse(spider: SeleniumSpider, response: SeleniumResponse) -> None:
-        quotes = [element.text for element in response.driver.find_elements_by_xpath('//blockquote/p')]
-        authors = [element.text for element in response.driver.find_elements_by_xpath('//blockquote/footer')]
-        for quote, author in zip(quotes, authors):
-            spider.save_item({'quote': quote, 'author': author})
-
-        link = None
-        try:
-            element = response.driver.find_element_by_xpath('//a[2][contains(@href, "page")]')
-            link = element.get_attribute('href')
-        except NoSuchElementException:
-            pass
+        quotes, authors, link = response.driver.execute_script(QUOTES_SCRIPT)
+        spider.save_items({'quote': quote, 'author': author} for quote, author in zip(quotes, authors))
 
         if link is not None:
             response.follow(link)
 
     @pytest.mark.parametrize('browser', [Browser.FIREFOX, Browser.CHROME])
-    def test_should_save_correct_output_when_giving_file_url(self, page_1_file_url, tmp_path, browser):
+    def test_should_save_correct_output_when_giving_file_url(self, page_1_file_url, page_file_urls, tmp_path, browser):
         backup_path = tmp_path / 'backup.mp'
         config = Configuration(
             item_processors=[self.processor],
@@ -267,7 +275,7 @@ class TestIntegrationSeleniumSpider:
         spider = SeleniumSpider(urls=[page_1_file_url], parse=self.parse, config=config)
         spider.run()
         stats = spider.statistics()
-        followed_urls = {page_1_file_url.replace('1', '2'), page_1_file_url.replace('1', '3')}
+        followed_urls = set(page_file_urls[1:])
 
         assert followed_urls == stats.followed_urls
         assert {page_1_file_url} | followed_urls == stats.reachable_urls
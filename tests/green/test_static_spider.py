@@ -9,7 +9,8 @@ from gevent.lock import RLock
 from gevent.pool import Pool
 from gevent.queue import JoinableQueue
 
-from scalpel.core.config import Configuration
+from scalpel.core.bloom import BloomFilter
+from scalpel.core.config import DEFAULT_QUEUE_MAXSIZE, Configuration
 from scalpel.core.message_pack import datetime_decoder
 from scalpel.core.spider import SpiderStatistics
 from scalpel.green.files import read_mp
@@ -41,6 +42,48 @@ class TestStaticSpider:
         assert len(spider.urls) == spider._queue.qsize()
         assert isinstance(spider._pool, Pool)
 
+    def test_should_have_an_unbounded_pool_by_default(self, green_spider):
+        assert green_spider._pool.size is None
+
+    def test_should_bound_pool_when_pool_size_is_configured(self):
+        spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=Configuration(pool_size=10))
+
+        assert 10 == spider._pool.size
+
+    @pytest.mark.parametrize(
+        ('pool_size', 'max_connections', 'max_keepalive_connections'), [(None, 100, 50), (150, 300, 150)]
+    )
+    def test_should_size_http_limits_according_to_pool_size(
+        self, pool_size, max_connections, max_keepalive_connections
+    ):
+        config = Configuration(pool_size=pool_size)
+        spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+        limits = spider._get_http_limits()
+
+        assert max_connections == limits.max_connections
+        assert max_keepalive_connections == limits.max_keepalive_connections
+
+    def test_should_share_http_client_with_robots_analyzer(self, green_spider):
+        assert green_spider._robots_analyser._http_client is green_spider._http_client
+
+    def test_should_have_a_bounded_queue_by_default(self, green_spider):
+        assert DEFAULT_QUEUE_MAXSIZE == green_spider._queue.maxsize
+
+    def test_should_have_an_unbounded_queue_when_queue_maxsize_is_none(self):
+        config = Configuration(queue_maxsize=None)
+        spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert spider._queue.maxsize is None
+
+    @pytest.mark.parametrize(('queue_maxsize', 'expected_maxsize'), [(5, 5), (1, 3)])
+    def test_should_bound_queue_when_queue_maxsize_is_configured(self, queue_maxsize, expected_maxsize):
+        urls = ['http://foo.com', 'http://bar.com', 'http://baz.com']
+        config = Configuration(queue_maxsize=queue_maxsize)
+        spider = StaticSpider(urls=urls, parse=lambda x, y: None, config=config)
+
+        assert expected_maxsize == spider._queue.maxsize
+        assert len(urls) == spider._queue.qsize()
+
     # _fetch tests
 
     @respx.mock
@@ -112,6 +155,29 @@ class TestStaticSpider:
 
         logger_mock.assert_any_call('url %s has already been processed', url)
 
+    def test_should_not_have_a_bloom_filter_by_default(self):
+        spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None)
+        assert spider._bloom is None
+
+    def test_should_have_a_bloom_filter_when_bloom_capacity_is_configured(self):
+        config = Configuration(bloom_capacity=1000, bloom_error_rate=0.1)
+        spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert isinstance(spider._bloom, BloomFilter)
+        assert 1000 == spider._bloom.capacity
+        assert 0.1 == spider._bloom.error_rate
+
+    def test_should_only_check_url_sets_when_bloom_filter_knows_the_url(self, mocker):
+        logger_mock = mocker.patch('logging.Logger.debug')
+        url = 'http://foo.com'
+        static_spider = StaticSpider(urls=[url], parse=lambda x, y: None, config=Configuration(bloom_capacity=100))
+
+        assert static_spider._is_url_already_processed(url) is False
+        assert url in static_spider._bloom
+        static_spider.reachable_urls.add(url)
+        assert static_spider._is_url_already_processed(url) is True
+        logger_mock.assert_any_call('url %s has already been processed', url)
+
     def test_should_read_file_content_when_giving_a_file_url(self, tmp_path):
         parse_args = []
         hello_file = tmp_path / 'hello.txt'
@@ -132,6 +198,16 @@ class TestStaticSpider:
         assert static_response._httpx_response is None
         assert {file_url} == static_spider.reachable_urls
 
+    def test_should_remove_leading_slash_of_file_path_on_windows(self, mocker):
+        mocker.patch('scalpel.green.static_spider._IS_WINDOWS', True)
+        read_mock = mocker.patch('scalpel.green.static_spider.read_text_file', return_value='hello world')
+        file_url = 'file:///C:/Users/kevin/hello.txt'
+        static_spider = StaticSpider(urls=[file_url], parse=lambda x, y: None)
+        static_spider._handle_url(file_url)
+
+        read_mock.assert_called_once_with('C:/Users/kevin/hello.txt')
+        assert {file_url} == static_spider.reachable_urls
+
     def test_should_not_called_parse_method_when_file_cannot_be_opened(self, tmp_path, mocker):
         logger_mock = mocker.patch('logging.Logger.exception')
         hello_file = tmp_path / 'hello.txt'
@@ -301,6 +377,83 @@ class TestStaticSpider:
         assert [fruit_1, fruit_2] == [item for item in read_mp(f'{backup.resolve()}')]
         assert "I'm a processor" in out
 
+    def test_should_write_items_by_batch_when_backup_batch_size_is_greater_than_1(self, tmp_path):
+        backup = tmp_path / 'backup.mp'
+        fruits = [{'fruit': 'pineapple'}, {'fruit': 'apple'}, {'fruit': 'orange'}]
+        config = Configuration(backup_filename=f'{backup.resolve()}', backup_batch_size=2)
+        static_spider = StaticSpider(urls=['https://foo.com'], parse=lambda x, y: None, config=config)
+        static_spider.save_item(fruits[0])
+
+        assert not backup.exists()
+        static_spider.save_item(fruits[1])
+        static_spider.save_item(fruits[2])
+        assert fruits[:2] == [item for item in read_mp(backup)]
+
+        static_spider._cleanup()
+        assert fruits == [item for item in read_mp(backup)]
+
+    def test_should_write_items_when_backup_flush_interval_is_exceeded(self, mocker, tmp_path):
+        monotonic_mock = mocker.patch('scalpel.green.static_spider.monotonic', return_value=100)
+        backup = tmp_path / 'backup.mp'
+        fruits = [{'fruit': 'pineapple'}, {'fruit': 'apple'}, {'fruit': 'orange'}]
+        config = Configuration(backup_filename=f'{backup.resolve()}', backup_batch_size=10, backup_flush_interval=5)
+        static_spider = StaticSpider(urls=['https://foo.com'], parse=lambda x, y: None, config=config)
+        static_spider._last_flush = 100
+        static_spider.save_item(fruits[0])
+        monotonic_mock.return_value = 104
+        static_spider.save_item(fruits[1])
+
+        assert not backup.exists()
+        monotonic_mock.return_value = 105
+        static_spider.save_items(fruits[2:])
+        assert fruits == [item for item in read_mp(backup)]
+        assert [] == static_spider._items_buffer
+        assert 105 == static_spider._last_flush
+
+    def test_should_save_many_items_at_once_and_skip_rejected_ones(self, tmp_path):
+        backup = tmp_path / 'backup.mp'
+        fruits = [{'fruit': 'pineapple'}, {'fruit': 'banana'}, {'fruit': 'orange'}]
+        config = Configuration(
+            backup_filename=f'{backup.resolve()}',
+            backup_batch_size=2,
+            item_processors=[lambda item: None if item['fruit'] == 'banana' else item],
+        )
+        static_spider = StaticSpider(urls=['https://foo.com'], parse=lambda x, y: None, config=config)
+        static_spider.save_items(fruits)
+
+        assert [fruits[0], fruits[2]] == [item for item in read_mp(backup)]
+        assert [] == static_spider._items_buffer
+
+    @pytest.mark.parametrize(('follow_robots_txt', 'expected_calls'), [(False, 0), (True, 2)])
+    def test_should_prefetch_robots_of_each_host_when_following_robots_txt(
+        self, mocker, follow_robots_txt, expected_calls
+    ):
+        prefetch_mock = mocker.patch('scalpel.green.robots.RobotsAnalyzer.prefetch')
+        mocker.patch('scalpel.green.static_spider.StaticSpider._handle_url')
+        urls = ['http://foo.com/1', 'http://foo.com/2', 'http://bar.com']
+        config = Configuration(follow_robots_txt=follow_robots_txt)
+        static_spider = StaticSpider(urls=urls, parse=lambda x, y: None, config=config)
+        static_spider.run()
+
+        assert expected_calls == prefetch_mock.call_count
+        called_urls = {call.args[0] for call in prefetch_mock.call_args_list}
+        assert ({'http://foo.com/1', 'http://bar.com'} if expected_calls else set()) == called_urls
+
+    def test_should_not_call_robots_analyzer_when_not_following_robots_txt(self, mocker):
+        can_fetch_mock = mocker.patch('scalpel.green.robots.RobotsAnalyzer.can_fetch')
+        static_spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None)
+
+        assert static_spider._is_url_excluded('http://foo.com') is False
+        can_fetch_mock.assert_not_called()
+
+    @pytest.mark.parametrize('can_fetch', [True, False])
+    def test_should_check_robots_analyzer_when_following_robots_txt(self, mocker, can_fetch):
+        mocker.patch('scalpel.green.robots.RobotsAnalyzer.can_fetch', return_value=can_fetch)
+        config = Configuration(follow_robots_txt=True)
+        static_spider = StaticSpider(urls=['http://foo.com'], parse=lambda x, y: None, config=config)
+
+        assert static_spider._is_url_excluded('http://foo.com') is not can_fetch
+
     # simple test of run and statistics methods, more reliable tests are below
 
     @respx.mock
@@ -324,6 +477,68 @@ class TestStaticSpider:
         assert stats.total_time > 0
         assert stats.average_fetch_time > 0
 
+    @respx.mock
+    def test_should_handle_all_urls_when_pool_size_is_1(self):
+        urls = ['http://foo.com', 'http://bar.com']
+        for url in urls:
+            respx.get(url)
+
+        static_spider = StaticSpider(urls=urls, parse=lambda x, y: None, config=Configuration(pool_size=1))
+        static_spider.run()
+
+        assert set(urls) == static_spider.reachable_urls
+
+    @respx.mock
+    def test_should_not_sleep_between_urls_when_request_delay_is_0(self, mocker):
+        sleep_spy = mocker.spy(gevent, 'sleep')
+        urls = ['http://foo.com', 'http://bar.com']
+        for url in urls:
+            respx.get(url)
+
+        static_spider = StaticSpider(urls=urls, parse=lambda x, y: None)
+        static_spider.run()
+
+        assert set(urls) == static_spider.reachable_urls
+        sleep_spy.assert_not_called()
+
+    def test_should_only_delay_urls_of_a_host_already_handled(self, mocker):
+        spawn_later_mock = mocker.patch('gevent.spawn_later')
+        spawn_url_task_mock = mocker.patch('scalpel.green.static_spider.StaticSpider._spawn_url_task')
+        urls = ['http://foo.com/1', 'http://bar.com', 'http://foo.com/2']
+        config = Configuration(min_request_delay=2, max_request_delay=2)
+        static_spider = StaticSpider(urls=urls, parse=lambda x, y: None, config=config)
+
+        worker = gevent.spawn(static_spider._worker)
+        gevent.sleep(0)
+        worker.kill()
+
+        assert {'http://foo.com/1', 'http://bar.com'} == {call.args[0] for call in spawn_url_task_mock.call_args_list}
+        wait_time, callback, url = spawn_later_mock.call_args.args
+        assert wait_time == pytest.approx(2, abs=0.1)
+        assert (static_spider._spawn_deferred_url_task, 'http://foo.com/2') == (callback, url)
+
+    def test_should_stop_taking_urls_when_deferred_urls_limit_is_reached(self, mocker):
+        mocker.patch('scalpel.green.static_spider.DEFERRED_URLS_LIMIT', 2)
+        spawn_later_mock = mocker.patch('gevent.spawn_later')
+        spawn_url_task_mock = mocker.patch('scalpel.green.static_spider.StaticSpider._spawn_url_task')
+        urls = [f'http://foo.com/{i}' for i in range(6)]
+        config = Configuration(min_request_delay=2, max_request_delay=2)
+        static_spider = StaticSpider(urls=urls, parse=lambda x, y: None, config=config)
+
+        worker = gevent.spawn(static_spider._worker)
+        gevent.sleep(0)
+        # the first url is handled at once, the next two are deferred and the fourth waits for a free slot
+        assert 2 == spawn_later_mock.call_count
+        assert 2 == static_spider._queue.qsize()
+
+        static_spider._spawn_deferred_url_task('http://foo.com/1')
+        gevent.sleep(0)
+        worker.kill()
+
+        assert 3 == spawn_later_mock.call_count
+        assert 1 == static_spider._queue.qsize()
+        spawn_url_task_mock.assert_any_call('http://foo.com/1')
+
 
 class TestIntegrationStaticSpider:
     """More concrete tests of StaticSpider class"""
@@ -358,16 +573,14 @@ class TestIntegrationStaticSpider:
 
         assert albert_count == 3
 
-    def test_should_work_with_file_url(self, page_1_file_url, tmp_path):
+    def test_should_work_with_file_url(self, page_1_file_url, page_file_urls, tmp_path):
         backup_path = tmp_path / 'backup.mp'
         config = Configuration(item_processors=[self.processor], backup_filename=f'{backup_path}')
         static_spider = StaticSpider(urls=[page_1_file_url], parse=self.parse, config=config)
         static_spider.run()
         stats = static_spider.statistics()
-        followed_urls = {
-            page_1_file_url.replace('1', '2').replace('///', '/'),
-            page_1_file_url.replace('1', '3').replace('///', '/'),
-        }
+        # urls followed by static responses are joined without the empty authority of the start url
+        followed_urls = {url.replace('///', '/') for url in page_file_urls[1:]}
 
         assert stats.reachable_urls == {page_1_file_url} | followed_urls
         assert stats.followed_urls == followed_urls
@@ -79,6 +79,7 @@ class TestAsyncFile:
             ('readinto', (bytearray(10),)),
             ('readinto1', (bytearray(10),)),
             ('seek', (0, 0)),
+            ('seek', (2, io.SEEK_CUR)),
             ('tell', ()),
             ('write', ('hello',)),
             ('writelines', ([],)),
@@ -95,6 +96,17 @@ class TestAsyncFile:
 
         async_file._pool.spawn.assert_called_once_with(getattr(self._io, method), *args)
 
+    @pytest.mark.parametrize('wrapper', [StringIO('hello'), BytesIO(b'hello')])
+    def test_should_not_use_threadpool_for_in_memory_objects(self, mocker, wrapper):
+        mocker.patch('scalpel.green.utils.io.get_hub')
+        async_file = AsyncFile(wrapper)
+
+        assert 5 == len(async_file.read())
+        async_file.seek(0)
+        assert 0 == async_file.tell()
+        async_file.flush()
+        async_file._pool.spawn.assert_not_called()
+
     @pytest.mark.parametrize(
         ('method', 'args', 'result'),
         [
@@ -0,0 +1,27 @@
+import gevent
+from gevent.queue import JoinableQueue
+
+from scalpel.green.utils.queue import AlternatingJoinableQueue
+
+
+class TestAlternatingJoinableQueue:
+    """Tests class AlternatingJoinableQueue"""
+
+    def test_should_be_a_joinable_queue(self):
+        assert isinstance(AlternatingJoinableQueue(), JoinableQueue)
+
+    def test_should_alternately_get_oldest_and_newest_items(self):
+        queue = AlternatingJoinableQueue(items=[1, 2, 3])
+        queue.put(4)
+        queue.put(5)
+
+        assert [1, 5, 2, 4, 3] == [queue.get() for _ in range(5)]
+
+    def test_should_keep_task_done_semantics(self):
+        queue = AlternatingJoinableQueue(items=['foo', 'bar'])
+        for _ in range(2):
+            queue.get()
+            queue.task_done()
+
+        assert 0 == queue.unfinished_tasks
+        gevent.with_timeout(1, queue.join)
@@ -1,4 +1,23 @@
 def assert_dicts(dict1, dict2):
-    assert len(dict1) == len(dict2)
-    for key in dict1:
-        assert dict1[key] == dict2[key]
+    # dict equality checks lengths first and compares items in C, pytest also shows the differing keys on failure
+    assert dict1 == dict2
+
+
+# user agent given to configurations during tests instead of a random one from fake_useragent
+FAKE_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:102.0) Gecko/20100101 Firefox/102.0'
+
+# gets quotes, authors and the next page link of a website page in one call to the browser instead of one per element
+QUOTES_SCRIPT = """
+const getTexts = (xpath) => {
+    const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const texts = [];
+    for (let i = 0; i < result.snapshotLength; i++) {
+        texts.push(result.snapshotItem(i).innerText.trim());
+    }
+    return texts;
+};
+const link = document.evaluate(
+    '//a[2][contains(@href, "page")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+return [getTexts('//blockquote/p'), getTexts('//blockquote/footer'), link === null ? null : link.href];
+"""